@@ -1,19 +1,19 @@
 from fastapi import FastAPI, UploadFile, File, HTTPException
-from fastapi.responses import HTMLResponse, FileResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi import Request
 from pydantic import BaseModel
+from typing import List
 import json
 import os
 import traceback
+import weakref
+import asyncio
+from collections import deque
 from contextlib import asynccontextmanager
-
-print("\n" + "="*60)
-print("[STARTUP] Initializing CV Parser Application")
-print("="*60)
-
+from cachetools import TTLCache
 
 
 # ============== LIFESPAN ==============
@@ -22,6 +22,7 @@ print("="*60)
 async def lifespan(app: FastAPI):
     """Lifespan event handler for startup and shutdown"""
     # Startup
+    init_services()
     print("""
     
     ╔═══════════════════════════════════════════════╗
@@ -41,6 +42,12 @@ async def lifespan(app: FastAPI):
     yield
     # Shutdown
     print("\n[SHUTDOWN] Application stopping...")
+    await aclose_async_client()
+    await asyncio.to_thread(shutdown_page_pool)
+    if db:
+        if db.vector_store:
+            db.vector_store.flush()
+        db.close()
 
 # ============== INITIALIZE APP ==============
 
@@ -51,6 +58,7 @@ app = FastAPI(
     docs_url="/docs",
     redoc_url="/redoc",
     openapi_url="/openapi.json",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -63,9 +71,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Create data directory
-os.makedirs("data", exist_ok=True)
-
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
@@ -74,44 +79,74 @@ templates = Jinja2Templates(directory="templates")
 
 # ============== INITIALIZE SERVICES ==============
 
-from src.gemini_parser import GeminiParser
+from src.gemini_parser import GeminiParser, shutdown_page_pool
 from src.database import Database
-from src.vector_store import SchemaVectorStore
+from src.vector_store import get_vector_store
+from src.serper_service import aclose_async_client
+from src.json_utils import dumps
 from src.agents.orchestrator import Orchestrator
 
-# Global session store
-session_store = {}
-orchestrator = Orchestrator()
-
-try:
-    print("[INIT] Importing config...")
-    from src.config import API_KEY
-    print(f"[INIT] API_KEY status: {'✓ Found' if API_KEY else '✗ Not found'}")
-    
-    print("[INIT] Initializing vector store...")
-    vector_store = SchemaVectorStore("data/chroma_db")
-    print("[✓] Vector store initialized")
-    
-    print("[INIT] Importing parser...")
-    parser = GeminiParser()
-    print("[✓] Parser initialized")
-    
-    print("[INIT] Importing database...")
-    db = Database("data/cv_database.db", vector_store=vector_store)
-    print("[✓] Database initialized")
+# Chat sessions keyed by cv_id; bounded, and sessions idle for an hour are dropped
+session_store = TTLCache(maxsize=512, ttl=3600)
+# Messages kept per session (the orchestrator only looks at the recent tail)
+HISTORY_LIMIT = 40
+# One lock per active session so concurrent messages don't race on its history
+session_locks = weakref.WeakValueDictionary()
+# Streamed chat turns still running; holds them so a closed stream doesn't drop the task
+_running_turns = set()
+
+# Uploads larger than this are rejected before any parsing
+MAX_UPLOAD_BYTES = 20 * 1024 * 1024
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+# Concurrent CV parse jobs (PDF extraction + Gemini call)
+parse_semaphore = asyncio.Semaphore(4)
+
+# Services are built at startup, not at import: page-extraction workers and uvicorn
+# re-import this module, and each import would open Chroma and the database again
+parser = None
+db = None
+orchestrator = None
+
+def init_services():
+    """Create the vector store, parser, database and orchestrator"""
+    global parser, db, orchestrator
+    print("\n" + "="*60)
+    print("[STARTUP] Initializing CV Parser Application")
+    print("="*60)
     
-    print("\n[✓✓✓] All services initialized successfully!")
-    print("[✓] RAG enabled with ChromaDB + text-embedding-004")
-    print("="*60 + "\n")
+    # Create data directory
+    os.makedirs("data", exist_ok=True)
     
-except Exception as e:
-    print(f"\n[✗✗✗] INITIALIZATION ERROR: {e}")
-    print("="*60)
-    import traceback
-    traceback.print_exc()
-    parser = None
-    db = None
+    try:
+        print("[INIT] Importing config...")
+        from src.config import API_KEY
+        print(f"[INIT] API_KEY status: {'✓ Found' if API_KEY else '✗ Not found'}")
+        
+        print("[INIT] Initializing vector store...")
+        vector_store = get_vector_store("data/chroma_db")
+        print("[✓] Vector store initialized")
+        
+        print("[INIT] Importing parser...")
+        parser = GeminiParser()
+        print("[✓] Parser initialized")
+        
+        print("[INIT] Importing database...")
+        db = Database("data/cv_database.db", vector_store=vector_store)
+        print("[✓] Database initialized")
+        
+        print("\n[✓✓✓] All services initialized successfully!")
+        print("[✓] RAG enabled with ChromaDB + text-embedding-004")
+        print("="*60 + "\n")
+        
+    except Exception as e:
+        print(f"\n[✗✗✗] INITIALIZATION ERROR: {e}")
+        print("="*60)
+        import traceback
+        traceback.print_exc()
+        parser = None
+        db = None
 
+    orchestrator = Orchestrator(db=db)
 
 # ============== ROUTES ==============
 
@@ -130,8 +165,7 @@ async def view_cv_page(request: Request, cv_id: int):
     """View individual CV details"""
     if not db:
         return "<p>Database not available</p>"
-    cv = db.get_cv_by_id(cv_id)
-    if not cv:
+    if await asyncio.to_thread(db.get_cv_name, cv_id) is None:
         return "<p>CV not found</p>"
     return templates.TemplateResponse("cv_detail.html", {"request": request, "cv_id": cv_id})
 
@@ -140,13 +174,27 @@ async def ai_assistant_page(request: Request, cv_id: int):
     """AI Assistant page for a specific CV"""
     if not db:
         return "<p>Database not available</p>"
-    cv = db.get_cv_by_id(cv_id)
-    if not cv:
+    cv_name = await asyncio.to_thread(db.get_cv_name, cv_id)
+    if cv_name is None:
         return "<p>CV not found</p>"
-    return templates.TemplateResponse("ai_assistant.html", {"request": request, "cv_id": cv_id, "cv_name": cv['name']})
+    return templates.TemplateResponse("ai_assistant.html", {"request": request, "cv_id": cv_id, "cv_name": cv_name})
 
 # ============== API ROUTES ==============
 
+async def read_upload(file: UploadFile) -> bytes:
+    """Read an upload in chunks, rejecting it as soon as it exceeds MAX_UPLOAD_BYTES"""
+    too_large = HTTPException(status_code=413, detail=f"File exceeds {MAX_UPLOAD_BYTES // (1024 * 1024)}MB limit")
+    size = getattr(file, "size", None)
+    if size is not None and size > MAX_UPLOAD_BYTES:
+        raise too_large
+    
+    content = bytearray()
+    while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+        content += chunk
+        if len(content) > MAX_UPLOAD_BYTES:
+            raise too_large
+    return bytes(content)
+
 @app.post("/api/parse-cv", tags=["CV Parsing"])
 async def parse_cv(file: UploadFile = File(...)):
     """Upload and parse a CV/Resume PDF file."""
@@ -161,10 +209,12 @@ async def parse_cv(file: UploadFile = File(...)):
         if not parser or not db:
             raise HTTPException(status_code=500, detail="Services not initialized. Check .env file.")
         
-        content = await file.read()
+        content = await read_upload(file)
         print(f"[📊] File size: {len(content)} bytes")
         
-        parsed_data = parser.parse_cv(content)
+        # Async Gemini client; PDF extraction and link checks run in worker threads
+        async with parse_semaphore:
+            parsed_data = await parser.aparse_cv(content)
         
         if "error" in parsed_data:
             raise HTTPException(status_code=400, detail=parsed_data["error"])
@@ -172,7 +222,7 @@ async def parse_cv(file: UploadFile = File(...)):
         print(f"[✓] Successfully parsed CV")
         print(f"[👤] Name: {parsed_data.get('contact_information', {}).get('name')}")
         
-        success = db.insert_cv(file.filename, parsed_data)
+        success = await asyncio.to_thread(db.insert_cv, file.filename, parsed_data)
         if success:
             print(f"[✓] Stored in normalized database")
         else:
@@ -194,7 +244,7 @@ async def get_all_cvs():
     if not db:
         raise HTTPException(status_code=500, detail="Database not available")
     
-    return db.get_all_cvs()
+    return await asyncio.to_thread(db.get_all_cvs)
 
 @app.get("/api/cvs/{cv_id}", tags=["Database"])
 async def get_cv_detail(cv_id: int):
@@ -202,7 +252,7 @@ async def get_cv_detail(cv_id: int):
     if not db:
         raise HTTPException(status_code=500, detail="Database not available")
     
-    cv = db.get_cv_by_id(cv_id)
+    cv = await asyncio.to_thread(db.get_cv_by_id, cv_id)
     if not cv:
         raise HTTPException(status_code=404, detail="CV not found")
     
@@ -214,14 +264,14 @@ async def delete_cv(cv_id: int):
     if not db:
         raise HTTPException(status_code=500, detail="Database not available")
     
-    cv = db.get_cv_by_id(cv_id)
-    if not cv:
+    cv_name = await asyncio.to_thread(db.get_cv_name, cv_id)
+    if cv_name is None:
         raise HTTPException(status_code=404, detail="CV not found")
     
 
     
-    db.delete_cv(cv_id)
-    return {"message": f"CV '{cv['name']}' deleted successfully"}
+    await asyncio.to_thread(db.delete_cv, cv_id)
+    return {"message": f"CV '{cv_name}' deleted successfully"}
 
 @app.get("/api/stats", tags=["Database"])
 async def get_statistics():
@@ -229,19 +279,19 @@ async def get_statistics():
     if not db:
         raise HTTPException(status_code=500, detail="Database not available")
     
-    return db.get_statistics()
+    return await asyncio.to_thread(db.get_statistics)
 
 @app.get("/api/export", tags=["Database"])
 async def export_cvs():
-    """Export all CVs to JSON file."""
+    """Export all CVs as a downloadable JSON file."""
     if not db:
         raise HTTPException(status_code=500, detail="Database not available")
     
-    output_file = db.export_to_json()
-    return FileResponse(
-        output_file,
+    # Streamed straight from SQLite (the sync generator runs in the threadpool)
+    return StreamingResponse(
+        db.iter_export_json(),
         media_type="application/json",
-        filename="cvs_export.json"
+        headers={"Content-Disposition": 'attachment; filename="cvs_export.json"'}
     )
 
 
@@ -252,12 +302,32 @@ async def health_check():
     return {"status": "healthy", "chatbot": "Disabled"}
 
 # ============== CHAT AGENT INTEGRATION ==============
-from src.agents.orchestrator import Orchestrator
 
 class ChatMessage(BaseModel):
     message: str
 
-orchestrator = Orchestrator()
+class BatchChatItem(BaseModel):
+    cv_id: int
+    message: str
+
+class BatchChatRequest(BaseModel):
+    items: List[BatchChatItem]
+
+# Declared before /api/chat/{cv_id} so "batch" isn't taken for a cv_id
+@app.post("/api/chat/batch", tags=["AI Assistant"])
+async def chat_batch(request: BatchChatRequest):
+    """
+    Run one chat turn per item concurrently (e.g. several candidates at once).
+    LLM requests across the batch are bounded by LLM_SEMAPHORE; failures are reported per item.
+    """
+    async def run_one(item: BatchChatItem):
+        try:
+            result = await chat_with_agent(item.cv_id, ChatMessage(message=item.message))
+            return {"cv_id": item.cv_id, **result}
+        except HTTPException as e:
+            return {"cv_id": item.cv_id, "error": e.detail}
+
+    return await asyncio.gather(*(run_one(item) for item in request.items))
 
 @app.post("/api/chat/{cv_id}", tags=["AI Assistant"])
 async def chat_with_agent(cv_id: int, message: ChatMessage):
@@ -267,19 +337,75 @@ async def chat_with_agent(cv_id: int, message: ChatMessage):
     if not db:
         raise HTTPException(status_code=500, detail="Database not available")
     
-    cv_data = db.get_cv_by_id(cv_id)
+    cv_data = await asyncio.to_thread(db.get_cv_by_id, cv_id)
     if not cv_data:
         raise HTTPException(status_code=404, detail="CV not found")
 
     user_message = message.message
     
+    async with _session_lock(cv_id):
+        return await _chat_turn(cv_id, cv_data, user_message)
+
+@app.post("/api/chat/{cv_id}/stream", tags=["AI Assistant"])
+async def chat_with_agent_stream(cv_id: int, message: ChatMessage):
+    """
+    Same turn as /api/chat/{cv_id}, as Server-Sent Events. Interviewer replies arrive as
+    {"delta": ...} events while they are generated; a final {"done": true, ...} event
+    carries the full result (or the error).
+    """
+    if not db:
+        raise HTTPException(status_code=500, detail="Database not available")
+    
+    cv_data = await asyncio.to_thread(db.get_cv_by_id, cv_id)
+    if not cv_data:
+        raise HTTPException(status_code=404, detail="CV not found")
+
+    events = asyncio.Queue()
+
+    async def on_token(text: str):
+        await events.put({"delta": text})
+
+    async def run_turn():
+        try:
+            async with _session_lock(cv_id):
+                result = await _chat_turn(cv_id, cv_data, message.message, on_token)
+            await events.put({"done": True, **result})
+        except HTTPException as e:
+            await events.put({"done": True, "error": e.detail})
+
+    async def event_stream():
+        # The turn runs to completion (and updates the session) even if the client goes away
+        turn = asyncio.create_task(run_turn())
+        _running_turns.add(turn)
+        turn.add_done_callback(_running_turns.discard)
+        try:
+            while True:
+                event = await events.get()
+                yield f"data: {dumps(event)}\n\n"
+                if event.get("done"):
+                    break
+        finally:
+            # Shielded: a disconnect cancels this generator, which must not cancel the turn
+            await asyncio.shield(turn)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+def _session_lock(cv_id: int) -> asyncio.Lock:
+    lock = session_locks.get(cv_id)
+    if lock is None:
+        lock = session_locks[cv_id] = asyncio.Lock()
+    return lock
+
+async def _chat_turn(cv_id: int, cv_data: dict, user_message: str, on_token=None):
     # Simple session management
     if cv_id not in session_store:
         contact = cv_data.get('contact_information', {})
         session_store[cv_id] = {
             "cv_id": cv_id,
-            "cv_data": cv_data,
-            "history": [],
+            # Bounded ring: appending past HISTORY_LIMIT drops the oldest message in place
+            "history": deque(maxlen=HISTORY_LIMIT),
+            # Full transcript, grown by one line per message (history itself is trimmed)
+            "transcript_str": "",
             "state": "START",
             "unverified_asked": 0,
             "projects_asked": 0,
@@ -293,21 +419,39 @@ async def chat_with_agent(cv_id: int, message: ChatMessage):
         }
     
     context = session_store[cv_id]
+    # The CV is loaded per request rather than kept alive in the session; links the
+    # candidate supplied (or declined) in chat are reapplied on top of it
+    overrides = context.get('contact_overrides')
+    if overrides:
+        cv_data['contact_information'] = {**(cv_data.get('contact_information') or {}), **overrides}
+    context['cv_data'] = cv_data
+    if on_token is not None:
+        # Streaming sink for agents that generate the reply token by token
+        context['_on_token'] = on_token
     
     try:
         # Route the message through the orchestrator
         result = await orchestrator.route(user_message, context)
         
         # Update session store with new context
-        session_store[cv_id] = result.get('context', context)
+        session = result.get('context', context)
+        session.pop('cv_data', None)
+        session.pop('_on_token', None)
         
-        # Append to history
-        session_store[cv_id]['history'].append({"role": "user", "content": user_message})
-        session_store[cv_id]['history'].append({
-            "role": "assistant", 
-            "content": result['response'], 
-            "agent": result.get('agent', 'Assistant')
-        })
+        # Append to history (the deque keeps only the recent tail)
+        turn = (
+            {"role": "user", "content": user_message},
+            {
+                "role": "assistant", 
+                "content": result['response'], 
+                "agent": result.get('agent', 'Assistant')
+            }
+        )
+        session['history'].extend(turn)
+        turn_lines = "\n".join(f"{m.get('agent', m['role'])}: {m['content']}" for m in turn)
+        transcript = session.get('transcript_str', "")
+        session['transcript_str'] = f"{transcript}\n{turn_lines}" if transcript else turn_lines
+        session_store[cv_id] = session
             
         return {
             "response": result['response'],
@@ -324,12 +468,15 @@ async def chat_with_agent(cv_id: int, message: ChatMessage):
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        context.pop('cv_data', None)
+        context.pop('_on_token', None)
 
 @app.get("/api/chat/history/{cv_id}", tags=["AI Assistant"])
 async def get_chat_history(cv_id: int):
     """Get chat history for a session"""
     if cv_id in session_store:
-        return {"history": session_store[cv_id].get('history', [])}
+        return {"history": list(session_store[cv_id].get('history', ()))}
     return {"history": []}
 @app.exception_handler(Exception)
 async def general_exception_handler(request: Request, exc: Exception):
@@ -344,9 +491,18 @@ async def general_exception_handler(request: Request, exc: Exception):
 
 if __name__ == "__main__":
     import uvicorn
+    # Sessions, locks and the orchestrator live in this process, so each worker has its
+    # own copy: only raise APP_WORKERS behind a sticky-session balancer (or once sessions
+    # move to a shared store). "auto" picks uvloop/httptools when they are installed.
+    workers = max(1, min(int(os.getenv("APP_WORKERS", "1")), os.cpu_count() or 1))
     uvicorn.run(
-        app,
+        # Workers need an import string; a single process serves this module's app
+        # instead of importing app.py a second time
+        app if workers == 1 else "app:app",
         host="0.0.0.0",
         port=8000,
+        workers=workers,
+        loop="auto",
+        http="auto",
         log_level="info"
     )
@@ -9,35 +9,48 @@ load_dotenv()
 sys.path.append(os.getcwd())
 
 try:
-    from src.vector_store import SchemaVectorStore
+    from src.vector_store import get_vector_store
     
     print("Initializing Vector Store viewer...")
-    vs = SchemaVectorStore("data/chroma_db")
+    vs = get_vector_store("data/chroma_db")
     
-    count = vs.collection.count()
+    # Schema chunks live in the embedded collection, resume contexts in the metadata-only one
+    count = vs.collection.count() + vs.meta_collection.count()
     print(f"\nTotal Documents in Collection: {count}")
     
-    # Get all items
-    data = vs.collection.get()
-    
-    ids = data['ids']
-    metas = data['metadatas']
-    docs = data['documents']
-    
     print("\n" + "="*80)
     print(" EXISTING CHUNKS ")
     print("="*80 + "\n")
     
-    for i, doc_id in enumerate(ids):
-        print(f"ID: {doc_id}")
-        print(f"Type: {metas[i].get('type', 'unknown')}")
-        print(f"Table: {metas[i].get('table', 'unknown')}")
-        if 'name' in metas[i]:
-            print(f"Name: {metas[i]['name']}")
+    # Page through the collection instead of loading everything at once.
+    # Embeddings are not needed for a human-readable dump, so don't fetch them.
+    PAGE = 200
+    for collection in (vs.collection, vs.meta_collection):
+        offset = 0
+        while True:
+            data = collection.get(limit=PAGE, offset=offset, include=["metadatas", "documents"])
+            
+            ids = data['ids']
+            if not ids:
+                break
+            metas = data['metadatas']
+            docs = data['documents']
+            
+            # Format the whole page and write it in one go rather than ~6 prints per chunk
+            buf = []
+            for i, doc_id in enumerate(ids):
+                buf.append(f"ID: {doc_id}\n")
+                buf.append(f"Type: {metas[i].get('type', 'unknown')}\n")
+                buf.append(f"Table: {metas[i].get('table', 'unknown')}\n")
+                if 'name' in metas[i]:
+                    buf.append(f"Name: {metas[i]['name']}\n")
+                buf.append("-" * 40 + "\n")
+                buf.append(f"Media/Content:\n{docs[i].strip()}\n")
+                buf.append("\n" + "="*80 + "\n\n")
+            sys.stdout.write("".join(buf))
+            sys.stdout.flush()
             
-        print("-" * 40)
-        print(f"Media/Content:\n{docs[i].strip()}")
-        print("\n" + "="*80 + "\n")
+            offset += PAGE
 
 except Exception as e:
     print(f"Error inspecting DB: {e}")
@@ -1,27 +1,10 @@
 from src.agents.base_agent import BaseAgent
 from typing import Dict, Any
 
-class FeedbackAgent(BaseAgent):
-    def __init__(self):
-        super().__init__("ScoreAgent", "Final Assessment and Feedback")
-
-    async def process(self, user_input: str, context: Dict[str, Any]) -> Dict[str, Any]:
-        history = context.get('history', [])
-        kpis = context.get('kpis', 'N/A')
-        
-        # Clean history for prompt
-        transcript = "\n".join([f"{m.get('agent', m['role'])}: {m['content']}" for m in history])
-        
-        system_prompt = f"""
+STATIC_SYSTEM_PROMPT = """
         You are a Senior Hiring Committee Member. 
         Your task is to provide a final, objective assessment of the candidate based on the interview transcript and the defined KPIs.
         
-        KPIs to Evaluate:
-        {kpis}
-        
-        Interview Transcript:
-        {transcript}
-        
         Please provide the assessment in the following format:
         
         ### Overall Score: [X/100]
@@ -38,8 +21,33 @@ class FeedbackAgent(BaseAgent):
         
         Be fair but critical. Look for concrete examples provided by the candidate.
         """
+
+DYNAMIC_PROMPT_TEMPLATE = """
+        KPIs to Evaluate:
+        {kpis}
+        
+        Interview Transcript:
+        {transcript}
+        """
+
+class FeedbackAgent(BaseAgent):
+    def __init__(self):
+        super().__init__("ScoreAgent", "Final Assessment and Feedback")
+
+    async def process(self, user_input: str, context: Dict[str, Any]) -> Dict[str, Any]:
+        history = context.get('history', [])
+        kpis = context.get('kpis', 'N/A')
+        
+        # Transcript kept up to date by the chat loop; rebuilt from history when absent
+        transcript = context.get('transcript_str')
+        if transcript is None:
+            transcript = "\n".join([f"{m.get('agent', m['role'])}: {m['content']}" for m in history])
         
-        evaluation = self._call_llm("Provide final structured score and feedback.", system_instruction=system_prompt)
+        # Static rules first (provider-cacheable), this interview's KPIs and transcript at the tail
+        dynamic_prompt = DYNAMIC_PROMPT_TEMPLATE.format(kpis=kpis, transcript=transcript)
+        evaluation = (await self._acall_llm(
+            "Provide final structured score and feedback.", STATIC_SYSTEM_PROMPT, dynamic_prompt
+        )).strip()
         
         return {
             "response": f"The interview is now complete. Thank you for your time. Here is my final assessment:\n\n{evaluation}",
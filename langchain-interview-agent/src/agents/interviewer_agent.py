@@ -1,6 +1,62 @@
 from src.agents.base_agent import BaseAgent
 from typing import Dict, Any
-import json
+import re
+
+# Phrases signalling the candidate can't (or won't) go deeper on the current topic
+_UNKNOWN_RE = re.compile(
+    r"don't know|do not know|no idea|not sure|don't have experience|never used"
+    r"|don't have any experience|basic structure|just did|same questions"
+    r"|skip|move on|no experience|haven't used",
+    re.IGNORECASE
+)
+
+def normalize(name) -> str:
+    """Normalization used for topic/project/skill comparisons."""
+    return str(name).strip().lower()
+
+def build_project_index(projects, covered) -> Dict[str, Any]:
+    """Map normalized project name -> project for projects not yet covered, in discovery order"""
+    index = {}
+    for p in projects:
+        name = p.get('name') if isinstance(p, dict) else p
+        if name and normalize(name) not in covered:
+            index.setdefault(normalize(name), p)
+    return index
+
+def project_digest(projects) -> str:
+    """Compact one-line project list for the prompt: names, with the language when known"""
+    parts = []
+    for p in projects:
+        if isinstance(p, dict):
+            name, language = p.get('name', ''), p.get('language')
+            parts.append(f"{name} ({language})" if language else str(name))
+        else:
+            parts.append(str(p))
+    return "; ".join(parts) if parts else "None found"
+
+STATIC_SYSTEM_PROMPT = """
+        You are a highly interactive Senior Technical Interviewer.
+        
+        YOUR MISSION: Maintain a strict 1:2 ratio of "Unverified Skill Questions" to "Main Project Deep Dives".
+        
+        CORE RULES:
+        1. **Conversational Continuity**: Always acknowledge or briefly critique the candidate's last answer before asking the next question.
+        2. **Deep Dives**: If a candidate provides a shallow answer, ask "How specifically?" or "What were the trade-offs?". Do not move to a new topic until you've exhausted the current one.
+        3. **Topic Grouping**: Focus on one specific project or one unverified skill at a time. Finish all your questions for that item before moving to the next.
+        4. **Explicit Attribution**: When talking about a project, mention it by name.
+        5. **No Repetition**: Do not revisit a project or skill you've already thoroughly explored. **DO NOT ask about topics listed in 'Topics Already Covered' below.**
+        
+        IMPORTANT: KPIs are internal. Do not name them.
+        """
+
+DYNAMIC_PROMPT_TEMPLATE = """
+        Context:
+        - Job: {job}
+        - KPIs: {kpis}
+        - Top CV Skills: {skills}
+        - Verified GitHub Projects: {projects}
+        - Topics Already Covered: {covered}
+        """
 
 class InterviewerAgent(BaseAgent):
     def __init__(self):
@@ -23,47 +79,43 @@ class InterviewerAgent(BaseAgent):
         unverified_asked = context.get('unverified_asked', 0)
         projects_asked = context.get('projects_asked', 0)
 
-        system_prompt = f"""
-        You are a highly interactive Senior Technical Interviewer.
-        
-        YOUR MISSION: Maintain a strict 1:2 ratio of "Unverified Skill Questions" to "Main Project Deep Dives".
-        
-        CORE RULES:
-        1. **Conversational Continuity**: Always acknowledge or briefly critique the candidate's last answer before asking the next question.
-        2. **Deep Dives**: If a candidate provides a shallow answer, ask "How specifically?" or "What were the trade-offs?". Do not move to a new topic until you've exhausted the current one.
-        3. **Topic Grouping**: Focus on one specific project or one unverified skill at a time. Finish all your questions for that item before moving to the next.
-        4. **Explicit Attribution**: When talking about a project, mention it by name.
-        5. **No Repetition**: Do not revisit a project or skill you've already thoroughly explored. **DO NOT ask about topics listed in 'Topics Already Covered' below.**
-        
-        Context:
-        - Job: {context.get('job_description', 'Technical Role')}
-        - KPIs: {kpis}
-        - Top CV Skills: {", ".join(cv_data.get('skills', [])[:5])}
-        - Verified GitHub Projects: {json.dumps(discovered_projects)}
-        - Topics Already Covered: {", ".join(covered_topics) if covered_topics else "None yet"}
-        
-        IMPORTANT: KPIs are internal. Do not name them.
-        """
+        # Project digest is built once per project list (research drops it when the list changes);
+        # each project's description is only sent once it becomes the topic
+        projects_digest = context.get('_projects_digest')
+        if projects_digest is None:
+            projects_digest = project_digest(discovered_projects)
+            context['_projects_digest'] = projects_digest
+
+        # Static rules stay byte-identical across turns; per-session context is
+        # appended at the tail.
+        dynamic_prompt = DYNAMIC_PROMPT_TEMPLATE.format(
+            job=context.get('job_description', 'Technical Role'),
+            kpis=kpis,
+            skills=", ".join(cv_data.get('skills', [])[:5]),
+            projects=projects_digest,
+            covered=", ".join(covered_topics) if covered_topics else "None yet"
+        )
 
         # Topic turn management: Increment current turn count if we have a topic
         if current_topic:
             topic_turns += 1
         
-        # Internal normalization helper
-        def normalize(name):
-            return str(name).strip().lower()
+        # Normalized covered topics, kept in context so later turns skip the rebuild.
+        # covered_topics only grows through this agent, so a size mismatch means it was reset.
+        normalized_covered = context.get('_normalized_covered_set')
+        if normalized_covered is None or len(normalized_covered) != len(covered_topics):
+            normalized_covered = {normalize(t) for t in covered_topics}
+            context['_normalized_covered_set'] = normalized_covered
+            context.pop('_project_index', None)
 
-        normalized_covered = [normalize(t) for t in covered_topics]
+        # Uncovered projects, built once per discovered project list and shrunk as topics are covered
+        project_index = context.get('_project_index')
+        if project_index is None:
+            project_index = build_project_index(discovered_projects, normalized_covered)
+            context['_project_index'] = project_index
         
         # Detect if the user says "I don't know" or something similar
-        input_lower = user_input.lower()
-        unknown_signals = [
-            "don't know", "do not know", "no idea", "not sure", 
-            "don't have experience", "never used", "don't have any experience",
-            "basic structure", "don't know much", "just did", "same questions", 
-            "skip", "move on", "no experience", "haven't used"
-        ]
-        is_unknown = any(signal in input_lower for signal in unknown_signals)
+        is_unknown = bool(_UNKNOWN_RE.search(user_input))
         
         # Force transition conditions
         force_transition = False
@@ -83,7 +135,8 @@ class InterviewerAgent(BaseAgent):
             # Mark as covered and increment corresponding counter
             if normalize(topic_name) not in normalized_covered:
                 covered_topics.append(topic_name)
-                normalized_covered.append(normalize(topic_name))
+                normalized_covered.add(normalize(topic_name))
+                project_index.pop(normalize(topic_name), None)
                 if "unverified" in current_topic.lower():
                     unverified_asked += 1
                 else:
@@ -112,14 +165,9 @@ class InterviewerAgent(BaseAgent):
                 prompt = f"I see {skill} is listed on your CV, but I don't see any relevant projects on your GitHub to show your experience. Can you tell me about your professional implementation of it?"
             else:
                 # Pick a discovered project
-                available_projects = []
-                for p in discovered_projects:
-                    name = p.get('name') if isinstance(p, dict) else p
-                    if name and normalize(name) not in normalized_covered:
-                        available_projects.append(p)
+                proj = next(iter(project_index.values()), None)
 
-                if available_projects:
-                    proj = available_projects[0]
+                if proj is not None:
                     p_name = proj.get('name') if isinstance(proj, dict) else proj
                     p_desc = proj.get('description', '') if isinstance(proj, dict) else ''
                     current_topic = f"Project: {p_name}"
@@ -144,15 +192,9 @@ class InterviewerAgent(BaseAgent):
             # Continue current topic with deeper follow-up
             prompt = f"The candidate said: '{user_input}'. Acknowledge their response and ask an even DEEPER, more technical follow-up question related to '{current_topic}'. Push for architectural trade-offs or specific edge cases."
 
-        from langchain_core.messages import SystemMessage, HumanMessage
-        
-        messages = [
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=prompt)
-        ]
-        
-        response_obj = await self.llm.ainvoke(messages)
-        response_text = response_obj.content
+        response_text = await self._acall_llm(
+            prompt, STATIC_SYSTEM_PROMPT, dynamic_prompt, on_token=context.get('_on_token')
+        )
         
         # Update trackers in context
         context['current_topic'] = current_topic
@@ -1,30 +1,55 @@
+from functools import cached_property
 from typing import Dict, Any, List
+import re
 from src.agents.greeting_agent import GreetingAgent
 from src.agents.research_agent import ResearchAgent
 from src.agents.kpi_agent import KPIAgent
 from src.agents.interviewer_agent import InterviewerAgent
 from src.agents.feedback_agent import FeedbackAgent
 
+# Whole-word greetings only ("hi" must not match "this")
+_GREET_RE = re.compile(r"\b(?:hi|hello|hey)\b", re.IGNORECASE)
+_LINK_RE = re.compile(r"github\.com|linkedin\.com", re.IGNORECASE)
+_FINISH_RE = re.compile(r"finish the interview", re.IGNORECASE)
+_RESEARCH_STATES = frozenset({'START', 'RESEARCH'})
+_INTERVIEW_STATES = frozenset({'INTERVIEW_START', 'INTERVIEWING'})
+
 class Orchestrator:
-    def __init__(self):
-        self.greeting_agent = GreetingAgent()
-        self.research_agent = ResearchAgent()
-        self.kpi_agent = KPIAgent()
-        self.interviewer_agent = InterviewerAgent()
-        self.feedback_agent = FeedbackAgent()
-        
+    def __init__(self, db=None):
+        # Database shared with agents that persist their output (KPIs), if available
+        self.db = db
+
+    # Agents are built on first use (the feedback agent only runs once an interview ends)
+    @cached_property
+    def greeting_agent(self) -> GreetingAgent:
+        return GreetingAgent()
+
+    @cached_property
+    def research_agent(self) -> ResearchAgent:
+        return ResearchAgent()
+
+    @cached_property
+    def kpi_agent(self) -> KPIAgent:
+        return KPIAgent(db=self.db)
+
+    @cached_property
+    def interviewer_agent(self) -> InterviewerAgent:
+        return InterviewerAgent()
+
+    @cached_property
+    def feedback_agent(self) -> FeedbackAgent:
+        return FeedbackAgent()
+
     async def route(self, user_input: str, context: Dict[str, Any]) -> Dict[str, Any]:
         state = context.get('state', 'START')
         history = context.get('history', [])
         
         # 1. Handle Greetings (Global) - but skip if links are present
-        text = user_input.lower()
-        has_links = "github.com" in text or "linkedin.com" in text
-        if any(greet in text for greet in ["hi", "hello", "hey"]) and len(history) < 3 and not has_links:
+        if len(history) < 3 and _GREET_RE.search(user_input) and not _LINK_RE.search(user_input):
             return await self.greeting_agent.process(user_input, context)
 
         # 2. State-based routing
-        if state == 'START' or state == 'RESEARCH':
+        if state in _RESEARCH_STATES:
             result = await self.research_agent.process(user_input, context)
             if result.get('next_state'):
                 context['state'] = result['next_state']
@@ -36,10 +61,10 @@ class Orchestrator:
                 context['state'] = result['next_state']
             return result
             
-        elif state == 'INTERVIEW_START' or state == 'INTERVIEWING':
+        elif state in _INTERVIEW_STATES:
             context['state'] = 'INTERVIEWING'
             # Trigger score after X turns or if user says "finish"
-            if "finish the interview" in text or len(history) > 25:
+            if _FINISH_RE.search(user_input) or len(history) > 25:
                 context['state'] = 'SCORING'
                 return await self.feedback_agent.process(user_input, context)
             
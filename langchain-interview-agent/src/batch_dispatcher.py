@@ -0,0 +1,65 @@
+"""
+Micro-batching dispatcher for LLM calls.
+Coalesces concurrent requests that arrive within a short window into one abatch() call.
+"""
+
+import asyncio
+from typing import Any, List, Optional, Set, Tuple
+
+
+class BatchDispatcher:
+    """
+    Collects message lists from concurrent callers and flushes them to
+    llm.abatch() once max_batch items are queued or flush_ms has elapsed.
+    Intended for latency-tolerant calls (e.g. greetings); keep interactive
+    follow-ups on direct ainvoke.
+    """
+
+    def __init__(self, llm, max_batch: int = 8, flush_ms: int = 50):
+        self.llm = llm
+        self.max_batch = max_batch
+        self.flush_ms = flush_ms
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, messages: Any) -> Any:
+        """Queue one request and wait for its response"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((messages, future))
+
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.flush_ms / 1000, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        # Keep a reference so the task isn't garbage collected mid-flight
+        task = asyncio.create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[Any, asyncio.Future]]):
+        try:
+            responses = await self.llm.abatch([messages for messages, _ in batch], return_exceptions=True)
+        except Exception as e:
+            responses = [e] * len(batch)
+
+        for (_, future), response in zip(batch, responses):
+            if future.done():
+                continue
+            if isinstance(response, Exception):
+                future.set_exception(response)
+            else:
+                future.set_result(response)
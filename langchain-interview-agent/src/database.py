@@ -1,262 +1,481 @@
+import atexit
+import logging
 import sqlite3
-import json
+import threading
 from datetime import datetime
-from typing import List, Optional, Dict, Any
+from pathlib import Path
+from typing import List, Optional, Dict, Any, Iterator, Tuple
+from cachetools import LRUCache
+from src.json_utils import dumps, loads
+
+_log = logging.getLogger(__name__)
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# raw_data is written as zstd-compressed JSON when zstandard is installed.
+# Legacy TEXT rows (and installs without zstandard) keep plain JSON text.
+_ZSTD_LEVEL = 3
+_ZSTD_COMPRESSOR = zstandard.ZstdCompressor(level=_ZSTD_LEVEL) if zstandard else None
+
+def _pack_raw_data(parsed_data: Dict):
+    """Serialize parsed CV data for the raw_data column (caller holds the write lock)"""
+    payload = dumps(parsed_data)
+    if _ZSTD_COMPRESSOR is None:
+        return payload
+    return _ZSTD_COMPRESSOR.compress(payload.encode('utf-8'))
+
+def _unpack_raw_data(value) -> Optional[str]:
+    """Return raw_data as JSON text regardless of how the row was stored"""
+    if isinstance(value, bytes):
+        if zstandard is None:
+            raise RuntimeError("raw_data is zstd-compressed but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(value).decode('utf-8')
+    return value
+
+# Insert statements shared by every insert_cv call (sqlite3 caches the compiled statements)
+_INSERT_RESUME = '''
+    INSERT INTO resumes 
+    (filename, name, email, phone, address, linkedin, github, profile, raw_data)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+_INSERT_SKILL = 'INSERT INTO skills (resume_id, skill_name) VALUES (?, ?)'
+_INSERT_EMPLOYMENT = '''
+    INSERT INTO employment_history 
+    (resume_id, job_title, company_name, location, start_date, end_date, description)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+'''
+_INSERT_EDUCATION = '''
+    INSERT INTO education 
+    (resume_id, degree, institution, location, start_date, end_date)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+_INSERT_CERTIFICATION = 'INSERT INTO certifications (resume_id, certification_name) VALUES (?, ?)'
+_INSERT_LANGUAGE = 'INSERT INTO languages (resume_id, language_name) VALUES (?, ?)'
+
+# Resume columns for list views; raw_data is left out so the blob never gets paged in
+_LIST_COLUMNS = 'id, filename, name, email, phone, address, linkedin, github, profile, created_at'
 
 class Database:
     def __init__(self, database_path: str = "data/cv_database.db", vector_store=None):
         self.db_path = database_path
         self.vector_store = vector_store
-        print(f"[DB] Initializing database at: {self.db_path}")
+        # One long-lived connection per thread, plus a lock since SQLite allows a single writer
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        # Assembled CVs by id, stored as JSON so each caller gets its own copy to modify.
+        # The generation counter stops a read racing a delete from re-caching the old CV.
+        self._cv_cache = LRUCache(maxsize=256)
+        self._cv_cache_lock = threading.Lock()
+        self._cv_cache_generation = 0
+        _log.info("Initializing database at: %s", self.db_path)
+        self.enable_wal()
         self.create_tables()
+        # Make sure PRAGMA optimize runs and the WAL is checkpointed even without an explicit close()
+        atexit.register(self.close)
         vector_status = "with vector store" if vector_store else "standalone"
-        print(f"[DB] Database ready ({vector_status})")
+        _log.info("Database ready (%s)", vector_status)
 
-    def get_connection(self):
-        """Create database connection"""
+    def enable_wal(self):
+        """Switch the database to WAL journaling (persistent, so only needed once)"""
         conn = sqlite3.connect(self.db_path)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.close()
+
+    def get_connection(self):
+        """Get this thread's database connection, opening it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            return conn
+        
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        # Write transactions take the write lock up front (BEGIN IMMEDIATE), so a
+        # concurrent writer waits on busy_timeout instead of failing mid-transaction
+        conn.isolation_level = 'IMMEDIATE'
+        # Per-connection tuning: WAL makes synchronous=NORMAL safe, bigger page
+        # cache (64MB) and mmap (256MB), temp tables in memory, and wait on locks.
+        # foreign_keys makes the schema's ON DELETE CASCADE take effect.
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA cache_size=-65536')
+        conn.execute('PRAGMA mmap_size=268435456')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.execute('PRAGMA busy_timeout=5000')
+        conn.execute('PRAGMA foreign_keys=ON')
+        
+        self._local.conn = conn
+        with self._connections_lock:
+            self._connections.append(conn)
+        return conn
+
+    def get_read_connection(self):
+        """Get this thread's read-only connection; all reads use it, so they never block writers"""
+        conn = getattr(self._local, 'ro_conn', None)
+        if conn is not None:
+            return conn
+        
+        conn = self._open_read_connection()
+        self._local.ro_conn = conn
+        with self._connections_lock:
+            self._connections.append(conn)
+        return conn
+
+    def _open_read_connection(self):
+        uri = f"{Path(self.db_path).absolute().as_uri()}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
         conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA query_only=1')
+        conn.execute('PRAGMA cache_size=-65536')
+        conn.execute('PRAGMA mmap_size=268435456')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.execute('PRAGMA busy_timeout=5000')
         return conn
 
+    def close(self):
+        """Refresh query planner statistics and close every pooled connection (safe to call twice)"""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.execute('PRAGMA optimize')
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
     def create_tables(self):
         """Create unified schema tables"""
         try:
             conn = self.get_connection()
-            cursor = conn.cursor()
             
-            print("[DB] Creating tables...")
+            # Schema changes go through the connection's context manager (commit or roll back as a unit)
+            with conn:
+                cursor = conn.cursor()
             
-            # Main CVs table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS resumes (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    filename TEXT NOT NULL,
-                    name TEXT,
-                    email TEXT,
-                    phone TEXT,
-                    address TEXT,
-                    linkedin TEXT,
-                    github TEXT,
-                    profile TEXT,
-                    raw_data TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            print("[DB] ✓ resumes table created")
-
-            # Skills table (normalized)
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS skills (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    resume_id INTEGER NOT NULL,
-                    skill_name TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (resume_id) REFERENCES resumes(id) ON DELETE CASCADE
-                )
-            ''')
-            print("[DB] ✓ skills table created")
-
-            # Employment history table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS employment_history (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    resume_id INTEGER NOT NULL,
-                    job_title TEXT,
-                    company_name TEXT,
-                    location TEXT,
-                    start_date TEXT,
-                    end_date TEXT,
-                    description TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (resume_id) REFERENCES resumes(id) ON DELETE CASCADE
-                )
-            ''')
-            print("[DB] ✓ employment_history table created")
-
-            # Education table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS education (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    resume_id INTEGER NOT NULL,
-                    degree TEXT,
-                    institution TEXT,
-                    location TEXT,
-                    start_date TEXT,
-                    end_date TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (resume_id) REFERENCES resumes(id) ON DELETE CASCADE
-                )
-            ''')
-            print("[DB] ✓ education table created")
-
-            # Certifications table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS certifications (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    resume_id INTEGER NOT NULL,
-                    certification_name TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (resume_id) REFERENCES resumes(id) ON DELETE CASCADE
-                )
-            ''')
-            print("[DB] ✓ certifications table created")
-
-            # Languages table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS languages (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    resume_id INTEGER NOT NULL,
-                    language_name TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (resume_id) REFERENCES resumes(id) ON DELETE CASCADE
-                )
-            ''')
-            print("[DB] ✓ languages table created")
+                # Main CVs table
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS resumes (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        filename TEXT NOT NULL,
+                        name TEXT,
+                        email TEXT,
+                        phone TEXT,
+                        address TEXT,
+                        linkedin TEXT,
+                        github TEXT,
+                        profile TEXT,
+                        raw_data BLOB,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''')
 
-            conn.commit()
-            conn.close()
-            print("[DB] ✓ All tables created successfully")
+                # Skills table (normalized)
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS skills (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        resume_id INTEGER NOT NULL,
+                        skill_name TEXT NOT NULL,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        FOREIGN KEY (resume_id) REFERENCES resumes(id) ON DELETE CASCADE
+                    )
+                ''')
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_skills_resume_id ON skills(resume_id)')
+
+                # Employment history table
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS employment_history (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        resume_id INTEGER NOT NULL,
+                        job_title TEXT,
+                        company_name TEXT,
+                        location TEXT,
+                        start_date TEXT,
+                        end_date TEXT,
+                        description TEXT,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        FOREIGN KEY (resume_id) REFERENCES resumes(id) ON DELETE CASCADE
+                    )
+                ''')
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_employment_history_resume_id ON employment_history(resume_id)')
+
+                # Education table
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS education (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        resume_id INTEGER NOT NULL,
+                        degree TEXT,
+                        institution TEXT,
+                        location TEXT,
+                        start_date TEXT,
+                        end_date TEXT,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        FOREIGN KEY (resume_id) REFERENCES resumes(id) ON DELETE CASCADE
+                    )
+                ''')
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_education_resume_id ON education(resume_id)')
+
+                # Certifications table
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS certifications (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        resume_id INTEGER NOT NULL,
+                        certification_name TEXT NOT NULL,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        FOREIGN KEY (resume_id) REFERENCES resumes(id) ON DELETE CASCADE
+                    )
+                ''')
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_certifications_resume_id ON certifications(resume_id)')
+
+                # Languages table
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS languages (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        resume_id INTEGER NOT NULL,
+                        language_name TEXT NOT NULL,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        FOREIGN KEY (resume_id) REFERENCES resumes(id) ON DELETE CASCADE
+                    )
+                ''')
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_languages_resume_id ON languages(resume_id)')
+
+                # Generated interview KPIs per resume and job description (hash)
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS cv_kpis (
+                        cv_id INTEGER NOT NULL,
+                        jd_hash TEXT NOT NULL,
+                        kpis TEXT NOT NULL,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        PRIMARY KEY (cv_id, jd_hash),
+                        FOREIGN KEY (cv_id) REFERENCES resumes(id) ON DELETE CASCADE
+                    )
+                ''')
+
+                # Refresh planner statistics so the resume_id indexes get used
+                cursor.execute('ANALYZE')
+
+            _log.debug("Schema tables and indexes ready")
             
         except Exception as e:
-            print(f"[DB ERROR] Failed to create tables: {e}")
+            _log.error("Failed to create tables: %s", e)
             raise
 
+    def _insert_resume_rows(self, cursor, filename: str, parsed_data: Dict) -> int:
+        """Insert one resume and all of its child rows; the caller owns the transaction"""
+        contact = parsed_data.get('contact_information', {})
+        
+        # Insert resume record
+        cursor.execute(_INSERT_RESUME, (
+            filename,
+            contact.get('name', ''),
+            contact.get('email', ''),
+            contact.get('phone', ''),
+            contact.get('address', ''),
+            contact.get('linkedin', ''),
+            contact.get('github', ''),
+            parsed_data.get('profile', ''),
+            _pack_raw_data(parsed_data)
+        ))
+        
+        resume_id = cursor.lastrowid
+        
+        # Insert skills
+        cursor.executemany(_INSERT_SKILL, [
+            (resume_id, skill) for skill in parsed_data.get('skills', [])
+        ])
+        
+        # Insert employment history
+        cursor.executemany(_INSERT_EMPLOYMENT, [
+            (
+                resume_id,
+                job.get('title', ''),
+                job.get('company', ''),
+                job.get('location', ''),
+                job.get('start_date', ''),
+                job.get('end_date', ''),
+                job.get('description', '')
+            )
+            for job in parsed_data.get('employment_history', [])
+        ])
+        
+        # Insert education
+        cursor.executemany(_INSERT_EDUCATION, [
+            (
+                resume_id,
+                edu.get('degree', ''),
+                edu.get('institution', ''),
+                edu.get('location', ''),
+                edu.get('start_date', ''),
+                edu.get('end_date', '')
+            )
+            for edu in parsed_data.get('education', [])
+        ])
+        
+        # Insert certifications
+        cursor.executemany(_INSERT_CERTIFICATION, [
+            (resume_id, cert) for cert in parsed_data.get('certifications', [])
+        ])
+        
+        # Insert languages
+        cursor.executemany(_INSERT_LANGUAGE, [
+            (resume_id, lang) for lang in parsed_data.get('languages', [])
+        ])
+        return resume_id
+
     def insert_cv(self, filename: str, parsed_data: Dict) -> bool:
         """Insert CV data into normalized database schema"""
+        return bool(self.insert_cvs([(filename, parsed_data)]))
+
+    def insert_cvs(self, cvs: List[Tuple[str, Dict]]) -> List[int]:
+        """
+        Insert several (filename, parsed_data) CVs in one transaction and hand their
+        vector-store contexts over as a single batch. Returns the new resume ids
+        (empty if the transaction failed).
+        """
         try:
             conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            contact = parsed_data.get('contact_information', {})
-            name = contact.get('name', '')
-            email = contact.get('email', '')
             
-            # Insert resume record
-            cursor.execute('''
-                INSERT INTO resumes 
-                (filename, name, email, phone, address, linkedin, github, profile, raw_data)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                filename,
-                name,
-                email,
-                contact.get('phone', ''),
-                contact.get('address', ''),
-                contact.get('linkedin', ''),
-                contact.get('github', ''),
-                parsed_data.get('profile', ''),
-                json.dumps(parsed_data)
-            ))
+            # One transaction for the resumes and all of their child rows; keep dirty
+            # pages in the cache (no spill to disk) while the rows go in
+            with self._write_lock:
+                conn.execute('PRAGMA cache_spill=OFF')
+                try:
+                    with conn:
+                        cursor = conn.cursor()
+                        resume_ids = [
+                            self._insert_resume_rows(cursor, filename, parsed_data)
+                            for filename, parsed_data in cvs
+                        ]
+                finally:
+                    conn.execute('PRAGMA cache_spill=ON')
             
-            resume_id = cursor.lastrowid
-            
-            # Insert skills
-            skills = parsed_data.get('skills', [])
-            for skill in skills:
-                cursor.execute(
-                    'INSERT INTO skills (resume_id, skill_name) VALUES (?, ?)',
-                    (resume_id, skill)
-                )
-            
-            # Insert employment history
-            employment = parsed_data.get('employment_history', [])
-            for job in employment:
-                cursor.execute('''
-                    INSERT INTO employment_history 
-                    (resume_id, job_title, company_name, location, start_date, end_date, description)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    resume_id,
-                    job.get('title', ''),
-                    job.get('company', ''),
-                    job.get('location', ''),
-                    job.get('start_date', ''),
-                    job.get('end_date', ''),
-                    job.get('description', '')
-                ))
-            
-            # Insert education
-            education = parsed_data.get('education', [])
-            for edu in education:
-                cursor.execute('''
-                    INSERT INTO education 
-                    (resume_id, degree, institution, location, start_date, end_date)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                ''', (
-                    resume_id,
-                    edu.get('degree', ''),
-                    edu.get('institution', ''),
-                    edu.get('location', ''),
-                    edu.get('start_date', ''),
-                    edu.get('end_date', '')
-                ))
-            
-            # Insert certifications
-            certs = parsed_data.get('certifications', [])
-            for cert in certs:
-                cursor.execute(
-                    'INSERT INTO certifications (resume_id, certification_name) VALUES (?, ?)',
-                    (resume_id, cert)
-                )
-            
-            # Insert languages
-            langs = parsed_data.get('languages', [])
-            for lang in langs:
-                cursor.execute(
-                    'INSERT INTO languages (resume_id, language_name) VALUES (?, ?)',
-                    (resume_id, lang)
-                )
-            
-            conn.commit()
-            conn.close()
-            print(f"[DB] Successfully inserted resume {resume_id}: {name}")
+            for resume_id, (_, parsed_data) in zip(resume_ids, cvs):
+                _log.debug("Inserted resume %d: %s", resume_id,
+                           parsed_data.get('contact_information', {}).get('name', ''))
             
             # Sync with vector store if available
             if self.vector_store:
-                self.vector_store.add_resume_context(resume_id, parsed_data)
+                self.vector_store.add_batch(zip(resume_ids, (parsed_data for _, parsed_data in cvs)))
             
-            return True
+            return resume_ids
             
         except Exception as e:
-            print(f"[DB ERROR] {e}")
-            return False
+            _log.error("Failed to insert resumes %s: %s", ", ".join(filename for filename, _ in cvs), e)
+            return []
 
     def get_all_cvs(self) -> List[Dict]:
-        """Get all resumes from database with all related data"""
-        conn = self.get_connection()
+        """Get all resumes from database with all related data (without raw_data; see get_raw_data)"""
+        return list(self.iter_cvs())
+
+    def iter_cvs(self, page_size: int = 500, include_raw: bool = False, conn=None) -> Iterator[Dict]:
+        """Yield resumes with related data one page at a time, so memory stays bounded"""
+        conn = conn or self.get_read_connection()
         cursor = conn.cursor()
-        cursor.execute('SELECT * FROM resumes ORDER BY created_at DESC')
-        rows = cursor.fetchall()
-        conn.close()
+        columns = '*' if include_raw else _LIST_COLUMNS
+        cursor.execute(f'SELECT {columns} FROM resumes ORDER BY created_at DESC')
         
-        results = []
-        for row in rows:
-            cv_dict = dict(row)
-            resume_id = row['id']
+        while True:
+            rows = cursor.fetchmany(page_size)
+            if not rows:
+                break
             
-            # Get all related data
-            cv_dict['skills'] = self.get_resume_skills(resume_id)
-            cv_dict['employment_history'] = self.get_resume_employment(resume_id)
-            cv_dict['education'] = self.get_resume_education(resume_id)
-            cv_dict['certifications'] = self.get_resume_certifications(resume_id)
-            cv_dict['languages'] = self.get_resume_languages(resume_id)
+            # Get related data for the page with one query per child table
+            related = self._get_related_data([row['id'] for row in rows], conn)
             
-            results.append(cv_dict)
+            for row in rows:
+                cv_dict = dict(row)
+                if include_raw:
+                    cv_dict['raw_data'] = _unpack_raw_data(cv_dict['raw_data'])
+                cv_dict.update(related[row['id']])
+                yield cv_dict
+
+    def _get_related_data(self, resume_ids: List[int], conn=None) -> Dict[int, Dict[str, List]]:
+        """Fetch child rows for many resumes at once, grouped by resume_id"""
+        related = {
+            resume_id: {
+                'skills': [],
+                'employment_history': [],
+                'education': [],
+                'certifications': [],
+                'languages': []
+            }
+            for resume_id in resume_ids
+        }
+        conn = conn or self.get_read_connection()
         
-        return results
+        # Stay well under SQLite's bound-parameter limit
+        for start in range(0, len(resume_ids), 500):
+            chunk = resume_ids[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            
+            for row in conn.execute(f'SELECT resume_id, skill_name FROM skills WHERE resume_id IN ({placeholders}) ORDER BY resume_id, skill_name', chunk):
+                related[row[0]]['skills'].append(row[1])
+            
+            for row in conn.execute(f'SELECT resume_id, job_title, company_name, location, start_date, end_date, description FROM employment_history WHERE resume_id IN ({placeholders}) ORDER BY resume_id, start_date DESC', chunk):
+                related[row[0]]['employment_history'].append({
+                    'title': row[1],
+                    'company': row[2],
+                    'location': row[3],
+                    'start_date': row[4],
+                    'end_date': row[5],
+                    'description': row[6]
+                })
+            
+            for row in conn.execute(f'SELECT resume_id, degree, institution, location, start_date, end_date FROM education WHERE resume_id IN ({placeholders}) ORDER BY resume_id, end_date DESC', chunk):
+                related[row[0]]['education'].append({
+                    'degree': row[1],
+                    'institution': row[2],
+                    'location': row[3],
+                    'start_date': row[4],
+                    'end_date': row[5]
+                })
+            
+            for row in conn.execute(f'SELECT resume_id, certification_name FROM certifications WHERE resume_id IN ({placeholders}) ORDER BY resume_id, id', chunk):
+                related[row[0]]['certifications'].append(row[1])
+            
+            for row in conn.execute(f'SELECT resume_id, language_name FROM languages WHERE resume_id IN ({placeholders}) ORDER BY resume_id, id', chunk):
+                related[row[0]]['languages'].append(row[1])
+        
+        return related
 
     def get_cv_by_id(self, cv_id: int) -> Optional[Dict]:
-        """Get specific resume by ID with all related data"""
-        conn = self.get_connection()
+        """Get specific resume by ID with all related data (cached; CVs don't change once stored)"""
+        with self._cv_cache_lock:
+            cached = self._cv_cache.get(cv_id)
+            generation = self._cv_cache_generation
+        if cached is not None:
+            return loads(cached)
+        
+        cv_dict = self._load_cv(cv_id)
+        if cv_dict is not None:
+            with self._cv_cache_lock:
+                if generation == self._cv_cache_generation:
+                    self._cv_cache[cv_id] = dumps(cv_dict)
+        return cv_dict
+
+    def get_cv_name(self, cv_id: int) -> Optional[str]:
+        """Candidate name for a resume ('' if unnamed), or None if it doesn't exist"""
+        row = self.get_read_connection().execute(
+            'SELECT name FROM resumes WHERE id = ?', (cv_id,)
+        ).fetchone()
+        if not row:
+            return None
+        return row[0] or ''
+
+    def _load_cv(self, cv_id: int) -> Optional[Dict]:
+        conn = self.get_read_connection()
         cursor = conn.cursor()
         cursor.execute('SELECT * FROM resumes WHERE id = ?', (cv_id,))
         row = cursor.fetchone()
-        conn.close()
         
         if not row:
             return None
         
         cv_dict = dict(row)
+        cv_dict['raw_data'] = _unpack_raw_data(cv_dict['raw_data'])
         
         # Get all related data
         cv_dict['skills'] = self.get_resume_skills(cv_id)
@@ -267,22 +486,28 @@ class Database:
         
         return cv_dict
 
+    def get_raw_data(self, cv_id: int) -> Optional[Dict]:
+        """Get the original parsed JSON for a resume"""
+        conn = self.get_read_connection()
+        row = conn.execute('SELECT raw_data FROM resumes WHERE id = ?', (cv_id,)).fetchone()
+        if not row or row[0] is None:
+            return None
+        return loads(_unpack_raw_data(row[0]))
+
     def get_resume_skills(self, resume_id: int) -> List[str]:
         """Get all skills for a resume"""
-        conn = self.get_connection()
+        conn = self.get_read_connection()
         cursor = conn.cursor()
         cursor.execute('SELECT skill_name FROM skills WHERE resume_id = ? ORDER BY skill_name', (resume_id,))
         skills = [row[0] for row in cursor.fetchall()]
-        conn.close()
         return skills
 
     def get_resume_employment(self, resume_id: int) -> List[Dict]:
         """Get employment history for a resume"""
-        conn = self.get_connection()
+        conn = self.get_read_connection()
         cursor = conn.cursor()
         cursor.execute('SELECT job_title, company_name, location, start_date, end_date, description FROM employment_history WHERE resume_id = ? ORDER BY start_date DESC', (resume_id,))
         rows = cursor.fetchall()
-        conn.close()
         
         results = []
         for row in rows:
@@ -298,11 +523,10 @@ class Database:
 
     def get_resume_education(self, resume_id: int) -> List[Dict]:
         """Get education for a resume"""
-        conn = self.get_connection()
+        conn = self.get_read_connection()
         cursor = conn.cursor()
         cursor.execute('SELECT degree, institution, location, start_date, end_date FROM education WHERE resume_id = ? ORDER BY end_date DESC', (resume_id,))
         rows = cursor.fetchall()
-        conn.close()
         
         results = []
         for row in rows:
@@ -317,41 +541,60 @@ class Database:
 
     def get_resume_certifications(self, resume_id: int) -> List[str]:
         """Get certifications for a resume"""
-        conn = self.get_connection()
+        conn = self.get_read_connection()
         cursor = conn.cursor()
         cursor.execute('SELECT certification_name FROM certifications WHERE resume_id = ?', (resume_id,))
         certs = [row[0] for row in cursor.fetchall()]
-        conn.close()
         return certs
 
     def get_resume_languages(self, resume_id: int) -> List[str]:
         """Get languages for a resume"""
-        conn = self.get_connection()
+        conn = self.get_read_connection()
         cursor = conn.cursor()
         cursor.execute('SELECT language_name FROM languages WHERE resume_id = ?', (resume_id,))
         langs = [row[0] for row in cursor.fetchall()]
-        conn.close()
         return langs
 
     def export_to_json(self) -> str:
         """Export all resumes to JSON"""
-        cvs = self.get_all_cvs()
         output_file = "data/cvs_export.json"
         with open(output_file, 'w') as f:
-            json.dump(cvs, f, indent=2, ensure_ascii=False)
+            f.writelines(self.iter_export_json())
         return output_file
 
+    def iter_export_json(self) -> Iterator[str]:
+        """
+        JSON array of every resume (with raw_data), yielded one CV at a time so nothing
+        is materialized. It uses its own connection, because a streaming response may
+        resume the generator on a different thread each time.
+        """
+        conn = self._open_read_connection()
+        try:
+            yield '['
+            separator = '\n'
+            for cv in self.iter_cvs(include_raw=True, conn=conn):
+                yield separator + dumps(cv, indent=True)
+                separator = ',\n'
+            yield '\n]' if separator != '\n' else ']'
+        finally:
+            conn.close()
+
     def execute_query(self, query: str) -> List[Dict]:
-        """Execute a SQL query and return results"""
+        """Execute a read-only SQL query (SELECT/WITH) and return results"""
+        if not query.lstrip().upper().startswith(('SELECT', 'WITH')):
+            _log.error("Query rejected, only SELECT/WITH queries are allowed")
+            return []
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
+            cursor = self.get_read_connection().cursor()
             cursor.execute(query)
             rows = cursor.fetchall()
-            conn.close()
-            return [dict(row) for row in rows]
+            # Compressed BLOB columns (raw_data) come back as JSON text
+            return [
+                {key: _unpack_raw_data(value) if isinstance(value, bytes) else value for key, value in dict(row).items()}
+                for row in rows
+            ]
         except Exception as e:
-            print(f"[DB QUERY ERROR] {e}")
+            _log.error("Query failed: %s", e)
             return []
 
     def get_schema_info(self) -> str:
@@ -360,7 +603,7 @@ class Database:
 DATABASE SCHEMA:
 
 1. resumes table:
-   - id, filename, name, email, phone, address, linkedin, github, profile, raw_data, created_at
+   - id, filename, name, email, phone, address, linkedin, github, profile, raw_data (compressed), created_at
 
 2. skills table:
    - id, resume_id, skill_name, created_at
@@ -382,10 +625,11 @@ DATABASE SCHEMA:
         """Delete a resume"""
         try:
             conn = self.get_connection()
-            cursor = conn.cursor()
-            cursor.execute('DELETE FROM resumes WHERE id = ?', (cv_id,))
-            conn.commit()
-            conn.close()
+            with self._write_lock, conn:
+                conn.execute('DELETE FROM resumes WHERE id = ?', (cv_id,))
+            with self._cv_cache_lock:
+                self._cv_cache.pop(cv_id, None)
+                self._cv_cache_generation += 1
             
             # Remove from vector store if available
             if self.vector_store:
@@ -393,12 +637,33 @@ DATABASE SCHEMA:
             
             return True
         except Exception as e:
-            print(f"[DB ERROR] {e}")
+            _log.error("Failed to delete resume %s: %s", cv_id, e)
+            return False
+
+    def get_kpis(self, cv_id: int, jd_hash: str) -> Optional[str]:
+        """KPIs previously generated for this resume and job description, if any"""
+        row = self.get_read_connection().execute(
+            'SELECT kpis FROM cv_kpis WHERE cv_id = ? AND jd_hash = ?', (cv_id, jd_hash)
+        ).fetchone()
+        return row[0] if row else None
+
+    def set_kpis(self, cv_id: int, jd_hash: str, kpis: str) -> bool:
+        """Store generated KPIs (removed with the resume)"""
+        try:
+            conn = self.get_connection()
+            with self._write_lock, conn:
+                conn.execute(
+                    'INSERT OR REPLACE INTO cv_kpis (cv_id, jd_hash, kpis) VALUES (?, ?, ?)',
+                    (cv_id, jd_hash, kpis)
+                )
+            return True
+        except Exception as e:
+            _log.error("Failed to store KPIs for resume %s: %s", cv_id, e)
             return False
 
     def get_statistics(self) -> Dict:
         """Get database statistics"""
-        conn = self.get_connection()
+        conn = self.get_read_connection()
         cursor = conn.cursor()
         
         cursor.execute('SELECT COUNT(*) FROM resumes')
@@ -407,7 +672,6 @@ DATABASE SCHEMA:
         cursor.execute('SELECT COUNT(DISTINCT skill_name) FROM skills')
         total_unique_skills = cursor.fetchone()[0]
         
-        conn.close()
         
         return {
             "total_resumes": total_resumes,
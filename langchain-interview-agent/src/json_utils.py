@@ -0,0 +1,36 @@
+"""
+JSON helpers that use orjson when it is installed and fall back to the stdlib.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps(obj, indent: bool = False) -> str:
+    """Serialize to a JSON string; compact unless indent is set (two spaces)."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0).decode()
+    if indent:
+        return json.dumps(obj, indent=2, ensure_ascii=False)
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False)
+
+
+def dumps_bytes(obj, sort_keys: bool = False) -> bytes:
+    """
+    Compact UTF-8 JSON bytes, e.g. for request bodies or hashing (no str round trip with orjson).
+    sort_keys gives a canonical encoding for cache keys.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS if sort_keys else 0)
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False, sort_keys=sort_keys).encode("utf-8")
+
+
+def loads(data):
+    """Parse JSON from str or bytes. Errors are json.JSONDecodeError (orjson's subclasses it)."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
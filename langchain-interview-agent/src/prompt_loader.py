@@ -3,14 +3,19 @@ Utility module to load system prompts from external files.
 """
 
 import os
+from functools import lru_cache
+from pathlib import Path
 from typing import Optional
 
 PROMPTS_DIR = "system_prompts"
 DEFAULT_VERSION = "v1.0"
 
+@lru_cache(maxsize=64)
 def load_prompt(agent_name: str, version: Optional[str] = None) -> str:
     """
     Load a system prompt from file.
+    Prompt files are static, so each (agent_name, version) is read once and cached;
+    call clear_prompt_caches() after editing prompts in a running process.
     
     Args:
         agent_name: Name of the agent (e.g., 'greeting', 'interviewer')
@@ -20,25 +25,33 @@ def load_prompt(agent_name: str, version: Optional[str] = None) -> str:
         The system prompt as a string
     """
     version = version or DEFAULT_VERSION
-    prompt_path = os.path.join(PROMPTS_DIR, version, f"{agent_name}_prompt.txt")
+    prompt_path = Path(PROMPTS_DIR, version, f"{agent_name}_prompt.txt")
     
-    if not os.path.exists(prompt_path):
+    if not prompt_path.exists():
         raise FileNotFoundError(f"Prompt file not found: {prompt_path}")
     
-    with open(prompt_path, 'r', encoding='utf-8') as f:
-        return f.read()
+    return prompt_path.read_text(encoding='utf-8')
 
-def list_available_prompts(version: Optional[str] = None) -> list:
-    """List all available prompt files for a version."""
-    version = version or DEFAULT_VERSION
+@lru_cache(maxsize=16)
+def _scan_prompts(version: str) -> tuple:
     version_dir = os.path.join(PROMPTS_DIR, version)
     
     if not os.path.exists(version_dir):
-        return []
+        return ()
     
-    prompts = [
-        f.replace('_prompt.txt', '') 
-        for f in os.listdir(version_dir) 
-        if f.endswith('_prompt.txt')
-    ]
-    return prompts
+    # scandir exposes entry names without a stat per file
+    with os.scandir(version_dir) as entries:
+        return tuple(
+            entry.name[:-len('_prompt.txt')]
+            for entry in entries
+            if entry.name.endswith('_prompt.txt')
+        )
+
+def list_available_prompts(version: Optional[str] = None) -> list:
+    """List all available prompt files for a version."""
+    return list(_scan_prompts(version or DEFAULT_VERSION))
+
+def clear_prompt_caches():
+    """Drop cached prompt contents and directory listings."""
+    load_prompt.cache_clear()
+    _scan_prompts.cache_clear()
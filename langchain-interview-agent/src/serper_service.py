@@ -1,49 +1,314 @@
-import requests
-import json
+import asyncio
+import hashlib
+import httpx
+import os
+import random
+import sqlite3
+import threading
+import time
+from cachetools import LRUCache
+from functools import lru_cache
+from typing import Optional
 from src.config import SERPER_API_KEY
+from src.json_utils import dumps, dumps_bytes, loads
+
+# Cached search responses are reused for this long (seconds)
+_CACHE_TTL = 7 * 24 * 3600
+# Responses with no results expire sooner, so a newly created profile is found within a day
+_NEGATIVE_TTL = 24 * 3600
+# Platforms find_links searches, in the order _collect_links takes them
+_PROFILE_PLATFORMS = ("linkedin", "github")
+# Rate-limited / transient upstream failures are retried with jittered exponential backoff
+_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+_MAX_ATTEMPTS = 3
+
+# Pooled clients shared by every SerperService, so searches reuse keep-alive HTTP/2
+# connections (concurrent ones multiplexed on one) instead of paying a TLS handshake each time
+_LIMITS = httpx.Limits(max_keepalive_connections=32, keepalive_expiry=60)
+_async_client: Optional[httpx.AsyncClient] = None
+_client: Optional[httpx.Client] = None
+_client_lock = threading.Lock()
+
+def get_client() -> httpx.Client:
+    """Shared sync client (thread-safe; the parser's threads search through it side by side)"""
+    global _client
+    with _client_lock:
+        if _client is None or _client.is_closed:
+            _client = httpx.Client(
+                transport=httpx.HTTPTransport(http2=True, limits=_LIMITS, retries=2),
+                timeout=10.0
+            )
+        return _client
+
+def get_async_client() -> httpx.AsyncClient:
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        # The transport retries failed connects; HTTP status retries are handled in SerperService
+        _async_client = httpx.AsyncClient(
+            transport=httpx.AsyncHTTPTransport(
+                http2=True,
+                limits=_LIMITS,
+                retries=2
+            ),
+            timeout=10.0
+        )
+    return _async_client
+
+async def aclose_async_client():
+    """Close the shared async client (called on application shutdown)"""
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+
+def _github_username(github_url: str) -> str:
+    """Profile name from a GitHub URL; trailing slashes and case don't change the query (or its cache key)"""
+    return github_url.rstrip('/').split('/')[-1].lower()
+
+def _is_error(results) -> bool:
+    """Serper error bodies ({"statusCode": ..., "message": ...}) rather than search results"""
+    return not isinstance(results, dict) or "statusCode" in results or (
+        "message" in results and "organic" not in results
+    )
+
+class SerperCache:
+    """
+    Serper responses keyed by a blake2b hash of (normalized query, num). An in-process LRU
+    sits in front of a SQLite table, so repeated lookups skip the paid API call across restarts.
+    Empty results are kept too, but only for negative_ttl, so a profile that doesn't exist
+    isn't searched for on every lookup yet turns up soon after it is created. Error bodies
+    are never stored. Entries older than their TTL count as misses.
+    """
+
+    def __init__(self, path: Optional[str] = "data/serper_cache.db", maxsize: int = 1024,
+                 ttl: int = _CACHE_TTL, negative_ttl: int = _NEGATIVE_TTL):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._memory = LRUCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self._conn = None
+
+        if path:
+            try:
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                self._conn = sqlite3.connect(path, check_same_thread=False)
+                self._conn.execute(
+                    'CREATE TABLE IF NOT EXISTS serper_cache '
+                    '(query_hash TEXT PRIMARY KEY, response_json BLOB NOT NULL, ts INTEGER NOT NULL)'
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                print(f"[Serper] Disk cache disabled: {e}")
+                self._conn = None
+
+    @staticmethod
+    def _key(payload) -> str:
+        # Google matches case- and spacing-insensitively, so "Jane  Doe" and "jane doe" share an entry
+        query = " ".join(payload['q'].lower().split())
+        return hashlib.blake2b(f"{query}\0{payload['num']}".encode("utf-8"), digest_size=16).hexdigest()
+
+    def get(self, payload):
+        key = self._key(payload)
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None and self._conn is not None:
+                row = self._conn.execute(
+                    'SELECT ts, response_json FROM serper_cache WHERE query_hash = ?', (key,)
+                ).fetchone()
+                if row:
+                    entry = (row[0], loads(row[1]))
+                    self._memory[key] = entry
+        # Error bodies written before set() filtered them are ignored as well
+        if entry is None or _is_error(entry[1]):
+            return None
+        ts, results = entry
+        ttl = self.ttl if results.get("organic") else self.negative_ttl
+        return None if time.time() - ts > ttl else results
+
+    def set(self, payload, results):
+        if _is_error(results):
+            return
+        key = self._key(payload)
+        ts = int(time.time())
+        with self._lock:
+            self._memory[key] = (ts, results)
+            if self._conn is not None:
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO serper_cache (query_hash, response_json, ts) VALUES (?, ?, ?)',
+                    (key, dumps(results), ts)
+                )
+                self._conn.commit()
+
+@lru_cache(maxsize=4)
+def _get_cache(path: str) -> SerperCache:
+    """One cache per file, shared by every SerperService"""
+    return SerperCache(path)
 
 class SerperService:
-    def __init__(self):
+    def __init__(self, cache_path: str = "data/serper_cache.db"):
         self.api_key = SERPER_API_KEY
         self.url = "https://google.serper.dev/search"
+        self.headers = {
+            'X-API-KEY': self.api_key,
+            'Content-Type': 'application/json'
+        }
+        self.cache = _get_cache(cache_path)
 
-    def search_profile(self, name, platform="linkedin"):
+    @staticmethod
+    def _backoff(attempt) -> float:
+        return random.uniform(0.1, 0.5) * 2 ** attempt
+
+    def _request(self, body):
+        """POST a JSON body, retrying 429/5xx; the last response is returned either way"""
+        for attempt in range(_MAX_ATTEMPTS):
+            response = get_client().post(self.url, headers=self.headers, content=body)
+            if response.status_code not in _RETRY_STATUSES or attempt == _MAX_ATTEMPTS - 1:
+                return response
+            time.sleep(self._backoff(attempt))
+
+    async def _arequest(self, body):
+        for attempt in range(_MAX_ATTEMPTS):
+            response = await get_async_client().post(self.url, headers=self.headers, content=body)
+            if response.status_code not in _RETRY_STATUSES or attempt == _MAX_ATTEMPTS - 1:
+                return response
+            await asyncio.sleep(self._backoff(attempt))
+
+    def _post(self, payload):
+        results = self.cache.get(payload)
+        if results is None:
+            response = self._request(dumps_bytes(payload))
+            results = loads(response.content)
+            if response.is_success:
+                self.cache.set(payload, results)
+        return results
+
+    async def _apost(self, payload):
+        results = self.cache.get(payload)
+        if results is None:
+            response = await self._arequest(dumps_bytes(payload))
+            results = loads(response.content)
+            if response.is_success:
+                self.cache.set(payload, results)
+        return results
+
+    def _batch_misses(self, payloads):
+        """Cached results (None for misses) and the positions that still need a request"""
+        results = [self.cache.get(payload) for payload in payloads]
+        return results, [i for i, cached in enumerate(results) if cached is None]
+
+    def _merge_batch(self, payloads, results, missing, batch, ok):
+        """Fill the misses from a batch response; False if it isn't batch-shaped"""
+        if not isinstance(batch, list) or len(batch) != len(missing):
+            return False
+        for i, item in zip(missing, batch):
+            results[i] = item
+            if ok:
+                self.cache.set(payloads[i], item)
+        return True
+
+    def _post_batch(self, payloads):
         """
-        Search for a professional profile on a specific platform.
+        Several queries in one request (Serper accepts a JSON array of queries).
+        Returns None if the API doesn't answer with one result per query.
         """
+        results, missing = self._batch_misses(payloads)
+        if missing:
+            response = self._request(dumps_bytes([payloads[i] for i in missing]))
+            if not self._merge_batch(payloads, results, missing, loads(response.content), response.is_success):
+                return None
+        return results
+
+    async def _apost_batch(self, payloads):
+        results, missing = self._batch_misses(payloads)
+        if missing:
+            response = await self._arequest(dumps_bytes([payloads[i] for i in missing]))
+            if not self._merge_batch(payloads, results, missing, loads(response.content), response.is_success):
+                return None
+        return results
+
+    # ---- Profile search ----
+
+    def _profile_payload(self, name, platform):
         if not self.api_key:
             print(f"[Serper] Warning: No API key configured. Skipping search for {platform}.")
             return None
+        print(f"[Serper] Searching for {platform} profile for: {name}")
+        return {"q": f"{name} {platform} profile", "num": 3}
 
-        query = f"{name} {platform} profile"
-        payload = json.dumps({
-            "q": query,
-            "num": 3
-        })
-        headers = {
-            'X-API-KEY': self.api_key,
-            'Content-Type': 'application/json'
-        }
+    @staticmethod
+    def _pick_profile_link(results, name, platform):
+        if "organic" in results:
+            for result in results["organic"]:
+                link = result.get("link", "")
+                # Basic validation/filtering for the platform
+                if platform.lower() in link.lower():
+                    print(f"[Serper] Found {platform} link: {link}")
+                    return link
+
+        print(f"[Serper] No {platform} profile found for: {name}")
+        return None
 
+    def search_profile(self, name, platform="linkedin"):
+        """
+        Search for a professional profile on a specific platform.
+        """
+        payload = self._profile_payload(name, platform)
+        if payload is None:
+            return None
         try:
-            print(f"[Serper] Searching for {platform} profile for: {name}")
-            response = requests.request("POST", self.url, headers=headers, data=payload)
-            results = response.json()
-
-            if "organic" in results:
-                for result in results["organic"]:
-                    link = result.get("link", "")
-                    # Basic validation/filtering for the platform
-                    if platform.lower() in link.lower():
-                        print(f"[Serper] Found {platform} link: {link}")
-                        return link
-            
-            print(f"[Serper] No {platform} profile found for: {name}")
+            return self._pick_profile_link(self._post(payload), name, platform)
+        except Exception as e:
+            print(f"[Serper] Error during search: {e}")
             return None
+
+    async def asearch_profile(self, name, platform="linkedin"):
+        """Async search_profile over the shared httpx client."""
+        payload = self._profile_payload(name, platform)
+        if payload is None:
+            return None
+        try:
+            return self._pick_profile_link(await self._apost(payload), name, platform)
         except Exception as e:
             print(f"[Serper] Error during search: {e}")
             return None
 
+    # ---- Link verification ----
+
+    @staticmethod
+    def _name_in_results(results, name):
+        if "organic" in results:
+            name_parts = name.lower().split()
+            threshold = min(2, len(name_parts))
+            if threshold == 0:
+                return bool(results["organic"])
+            for result in results["organic"]:
+                # Name parts never contain spaces, so one joined string matches exactly like title/snippet apart
+                combined = f"{result.get('title', '')} {result.get('snippet', '')}".lower()
+
+                # Check if all parts of the name (or at least first and last) appear in title/snippet
+                matches = 0
+                for part in name_parts:
+                    if part in combined:
+                        matches += 1
+                        if matches >= threshold:
+                            return True
+        return False
+
+    @staticmethod
+    def _fallback_payload(link, name):
+        # Fallback search: name + "site:domain"
+        domain = "linkedin.com" if "linkedin.com" in link else "github.com"
+        return {"q": f'"{name}" site:{domain}', "num": 3}
+
+    @staticmethod
+    def _link_in_results(results, link):
+        if "organic" in results:
+            for result in results["organic"]:
+                found_link = result.get("link", "")
+                if link.split('?')[0].rstrip('/') in found_link or found_link in link:
+                    return True
+        return False
+
     def verify_link(self, link, name):
         """
         Verify if a given link belongs to the candidate with the provided name.
@@ -52,52 +317,38 @@ class SerperService:
         if not self.api_key or not link or not name:
             return False
 
-        # Query for the specific link to see how Google indexes it
-        # We search for the link itself to get the snippet/title
-        query = f'link:"{link}"'
-        payload = json.dumps({
-            "q": query,
-            "num": 1
-        })
-        headers = {
-            'X-API-KEY': self.api_key,
-            'Content-Type': 'application/json'
-        }
+        try:
+            print(f"[Serper] Verifying link {link} for candidate: {name}")
+            # Query for the specific link to see how Google indexes it
+            # We search for the link itself to get the snippet/title
+            if self._name_in_results(self._post({"q": f'link:"{link}"', "num": 1}), name):
+                print(f"[Serper] Verification SUCCESS for {link}")
+                return True
+
+            if self._link_in_results(self._post(self._fallback_payload(link, name)), link):
+                print(f"[Serper] Verification SUCCESS (fallback search) for {link}")
+                return True
+
+            print(f"[Serper] Verification FAILED for {link}")
+            return False
+        except Exception as e:
+            print(f"[Serper] Error during verification: {e}")
+            return False
+
+    async def averify_link(self, link, name):
+        """Async verify_link, so independent verifications can run concurrently."""
+        if not self.api_key or not link or not name:
+            return False
 
         try:
             print(f"[Serper] Verifying link {link} for candidate: {name}")
-            response = requests.request("POST", self.url, headers=headers, data=payload)
-            results = response.json()
-
-            if "organic" in results:
-                for result in results["organic"]:
-                    title = result.get("title", "").lower()
-                    snippet = result.get("snippet", "").lower()
-                    name_parts = name.lower().split()
-                    
-                    # Check if all parts of the name (or at least first and last) appear in title/snippet
-                    matches = sum(1 for part in name_parts if part in title or part in snippet)
-                    if matches >= min(2, len(name_parts)):
-                        print(f"[Serper] Verification SUCCESS for {link}")
-                        return True
-            
-            # Fallback search: name + "site:domain"
-            domain = "linkedin.com" if "linkedin.com" in link else "github.com"
-            query_fallback = f'"{name}" site:{domain}'
-            payload_fallback = json.dumps({
-                "q": query_fallback,
-                "num": 3
-            })
-            
-            response_fb = requests.request("POST", self.url, headers=headers, data=payload_fallback)
-            results_fb = response_fb.json()
-            
-            if "organic" in results_fb:
-                for result in results_fb["organic"]:
-                    found_link = result.get("link", "")
-                    if link.split('?')[0].rstrip('/') in found_link or found_link in link:
-                        print(f"[Serper] Verification SUCCESS (fallback search) for {link}")
-                        return True
+            if self._name_in_results(await self._apost({"q": f'link:"{link}"', "num": 1}), name):
+                print(f"[Serper] Verification SUCCESS for {link}")
+                return True
+
+            if self._link_in_results(await self._apost(self._fallback_payload(link, name)), link):
+                print(f"[Serper] Verification SUCCESS (fallback search) for {link}")
+                return True
 
             print(f"[Serper] Verification FAILED for {link}")
             return False
@@ -105,6 +356,24 @@ class SerperService:
             print(f"[Serper] Error during verification: {e}")
             return False
 
+    # ---- GitHub repositories ----
+
+    @staticmethod
+    def _parse_repos(results, username):
+        repos = []
+        if "organic" in results:
+            for result in results["organic"]:
+                title = result.get("title", "")
+                snippet = result.get("snippet", "")
+
+                # Try to extract repo name from title (usually "username/reponame")
+                if "/" in title and username.lower() in title.lower():
+                    repo_name = title.split()[0] # Simplistic extraction
+                    if "/" in repo_name:
+                        repos.append({"name": repo_name, "description": snippet})
+
+        return repos[:3]
+
     def get_github_repos(self, github_url):
         """
         Search for repositories on a GitHub profile.
@@ -112,55 +381,80 @@ class SerperService:
         if not self.api_key or not github_url:
             return []
 
-        username = github_url.split('/')[-1]
-        query = f'site:github.com "{username}" repositories'
-        payload = json.dumps({
-            "q": query,
-            "num": 5
-        })
-        headers = {
-            'X-API-KEY': self.api_key,
-            'Content-Type': 'application/json'
-        }
+        username = _github_username(github_url)
+        try:
+            print(f"[Serper] Fetching repos for: {username}")
+            results = self._post({"q": f'site:github.com "{username}" repositories', "num": 5})
+            return self._parse_repos(results, username)
+        except Exception as e:
+            print(f"[Serper] Error fetching repos: {e}")
+            return []
+
+    async def aget_github_repos(self, github_url):
+        """Async get_github_repos over the shared httpx client."""
+        if not self.api_key or not github_url:
+            return []
 
+        username = _github_username(github_url)
         try:
             print(f"[Serper] Fetching repos for: {username}")
-            response = requests.request("POST", self.url, headers=headers, data=payload)
-            results = response.json()
-            repos = []
-
-            if "organic" in results:
-                for result in results["organic"]:
-                    title = result.get("title", "")
-                    link = result.get("link", "")
-                    snippet = result.get("snippet", "")
-                    
-                    # Try to extract repo name from title (usually "username/reponame")
-                    if "/" in title and username.lower() in title.lower():
-                        repo_name = title.split()[0] # Simplistic extraction
-                        if "/" in repo_name:
-                            repos.append({"name": repo_name, "description": snippet})
-            
-            return repos[:3]
+            results = await self._apost({"q": f'site:github.com "{username}" repositories', "num": 5})
+            return self._parse_repos(results, username)
         except Exception as e:
             print(f"[Serper] Error fetching repos: {e}")
             return []
 
-    def find_links(self, name):
-        """
-        Find both LinkedIn and GitHub links for a name.
-        """
-        if not name:
-            return {}
+    # ---- Combined lookup ----
 
+    @staticmethod
+    def _collect_links(linkedin, github):
         links = {}
-        
-        linkedin = self.search_profile(name, "linkedin")
         if linkedin:
             links["linkedin"] = linkedin
-            
-        github = self.search_profile(name, "github")
         if github:
             links["github"] = github
-            
         return links
+
+    def find_links(self, name):
+        """
+        Find both LinkedIn and GitHub links for a name.
+        Both searches go out as one batched request.
+        """
+        if not name:
+            return {}
+
+        payloads = [self._profile_payload(name, platform) for platform in _PROFILE_PLATFORMS]
+        if None in payloads:
+            return {}
+        try:
+            results = self._post_batch(payloads)
+            if results is None:
+                # Not batch-shaped; send the queries one at a time
+                results = [self._post(payload) for payload in payloads]
+        except Exception as e:
+            print(f"[Serper] Error during search: {e}")
+            return {}
+        return self._collect_links(*(
+            self._pick_profile_link(result, name, platform)
+            for result, platform in zip(results, _PROFILE_PLATFORMS)
+        ))
+
+    async def afind_links(self, name):
+        """Async find_links; falls back to two concurrent searches if batching isn't supported."""
+        if not name:
+            return {}
+
+        payloads = [self._profile_payload(name, platform) for platform in _PROFILE_PLATFORMS]
+        if None in payloads:
+            return {}
+        try:
+            results = await self._apost_batch(payloads)
+            if results is None:
+                results = await asyncio.gather(*(self._apost(payload) for payload in payloads))
+        except Exception as e:
+            print(f"[Serper] Error during search: {e}")
+            return {}
+        return self._collect_links(*(
+            self._pick_profile_link(result, name, platform)
+            for result, platform in zip(results, _PROFILE_PLATFORMS)
+        ))
@@ -1,6 +1,32 @@
 import os
+import time
 import google.generativeai as genai
 from dotenv import load_dotenv
+from src.json_utils import dumps, loads
+
+# Model listings are reused for a day, per SDK version, instead of calling the API every run
+CACHE_FILE = "data/model_cache.json"
+CACHE_TTL = 24 * 3600
+
+def load_cached_models():
+    try:
+        with open(CACHE_FILE, "rb") as f:
+            cache = loads(f.read())
+    except (OSError, ValueError):
+        return None
+    if cache.get("sdk_version") != genai.__version__ or time.time() - cache.get("fetched_at", 0) > CACHE_TTL:
+        return None
+    return cache["models"]
+
+def fetch_models():
+    models = [
+        {"name": m.name, "methods": list(m.supported_generation_methods)}
+        for m in genai.list_models()
+    ]
+    os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
+    with open(CACHE_FILE, "w") as f:
+        f.write(dumps({"sdk_version": genai.__version__, "fetched_at": time.time(), "models": models}))
+    return models
 
 load_dotenv()
 
@@ -10,7 +36,9 @@ genai.configure(api_key=api_key)
 print("Listing supported models:")
 
 print("Listing supported models:")
-for m in genai.list_models():
-    print(f"Model: {m.name}")
-    print(f"Methods: {m.supported_generation_methods}")
-
+models = load_cached_models()
+if models is None:
+    models = fetch_models()
+for m in models:
+    print(f"Model: {m['name']}")
+    print(f"Methods: {m['methods']}")
@@ -1,5 +1,6 @@
-from typing import Dict, Any, List, Optional
-from src.chain_factory import get_llm
+from typing import Awaitable, Callable, Dict, Any, List, Optional
+from langchain_core.messages import SystemMessage, HumanMessage
+from src.chain_factory import LLM_SEMAPHORE, get_llm
 import os
 
 class BaseAgent:
@@ -14,18 +15,35 @@ class BaseAgent:
         Should return a dict with 'response', 'agent' and updated 'context'.
         """
         raise NotImplementedError("Subclasses must implement process()")
-    
-    def _call_llm(self, prompt: str, system_instruction: Optional[str] = None) -> str:
-        """Helper to call Gemini via LangChain"""
-        if system_instruction:
-            # We can use a prompt template or just a quick system message
-            from langchain_core.messages import SystemMessage, HumanMessage
-            messages = [
-                SystemMessage(content=system_instruction),
-                HumanMessage(content=prompt)
-            ]
-            response = self.llm.invoke(messages)
-        else:
-            response = self.llm.invoke(prompt)
-            
-        return response.content.strip()
+
+    def _build_messages(self, prompt: str, static_prompt: str, dynamic_prompt: str = "") -> List:
+        """
+        Builds the message list with the static prompt first and dynamic context at the tail,
+        so every call for an agent shares the same prompt prefix.
+        """
+        system_content = f"{static_prompt}\n{dynamic_prompt}" if dynamic_prompt else static_prompt
+        return [
+            SystemMessage(content=system_content),
+            HumanMessage(content=prompt)
+        ]
+
+    async def _ainvoke_text(self, messages: List, on_token: Optional[Callable[[str], Awaitable]] = None, **kwargs) -> str:
+        """
+        Response text for messages. With on_token the response is streamed and each
+        delta is handed to it as it arrives; the full text is still returned.
+        """
+        async with LLM_SEMAPHORE:
+            if on_token is None:
+                return (await self.llm.ainvoke(messages, **kwargs)).content
+            parts = []
+            async for chunk in self.llm.astream(messages, **kwargs):
+                if chunk.content:
+                    parts.append(chunk.content)
+                    await on_token(chunk.content)
+            return "".join(parts)
+
+    async def _acall_llm(self, prompt: str, static_prompt: str, dynamic_prompt: str = "",
+                         on_token: Optional[Callable[[str], Awaitable]] = None) -> str:
+        """Async LLM call with the static system prompt ahead of the per-call context"""
+        messages = self._build_messages(prompt, static_prompt, dynamic_prompt)
+        return await self._ainvoke_text(messages, on_token)
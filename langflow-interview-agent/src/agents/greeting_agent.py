@@ -1,20 +1,25 @@
 from src.agents.base_agent import BaseAgent
+from src.batch_dispatcher import BatchDispatcher
 from typing import Dict, Any
 
-class GreetingAgent(BaseAgent):
-    def __init__(self):
-        super().__init__("GreetingBot", "Conversational Greetings and Small Talk")
-
-    async def process(self, user_input: str, context: Dict[str, Any]) -> Dict[str, Any]:
-        system_prompt = """
+SYSTEM_PROMPT = """
         You are a friendly Greeting Agent for an Interview System.
         Your job is to respond to greetings (Hi, Hello), small talk (how are you), 
         and closing remarks (bye, thank you).
         Keep it brief and professional. 
         Always remind the user that you are here to help them with the interview process if they seem lost.
         """
-        
-        response = self._call_llm(user_input, system_instruction=system_prompt)
+
+class GreetingAgent(BaseAgent):
+    def __init__(self):
+        super().__init__("GreetingBot", "Conversational Greetings and Small Talk")
+        # Greetings share one system prompt and aren't latency critical, so
+        # concurrent sessions are coalesced into a single batched call.
+        self.dispatcher = BatchDispatcher(self.llm, max_batch=8, flush_ms=50)
+
+    async def process(self, user_input: str, context: Dict[str, Any]) -> Dict[str, Any]:
+        messages = self._build_messages(user_input, SYSTEM_PROMPT)
+        response = (await self.dispatcher.submit(messages)).content.strip()
         
         return {
             "response": response,
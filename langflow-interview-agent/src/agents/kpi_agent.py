@@ -1,9 +1,31 @@
 from src.agents.base_agent import BaseAgent
 from typing import Dict, Any
+import asyncio
+import hashlib
+
+STATIC_SYSTEM_PROMPT = """
+        You are an expert HR Specialist and Technical Lead.
+        Your task is to define 3-5 specific Key Performance Indicators (KPIs) for an upcoming interview.
+        
+        For each KPI:
+        - Name it clearly (e.g., "Architectural Reasoning", "Python Proficiency").
+        - Provide a 1-sentence description of what success looks like.
+        - Set a "Benchmark" based on the candidate's seniority (e.g., "Expected: Senior level architectural design").
+
+        Output the KPIs as a clean, numbered list. No extra conversational filler.
+        """
+
+DYNAMIC_PROMPT_TEMPLATE = """
+        Job Description: {jd}
+        Candidate Summary: {profile}
+        Top Skills: {skills}
+        """
 
 class KPIAgent(BaseAgent):
-    def __init__(self):
+    def __init__(self, db=None):
         super().__init__("KPIAgent", "Interview KPI Definition and Benchmarking")
+        # Optional Database used to reuse KPIs generated for the same CV and role
+        self.db = db
 
     async def process(self, user_input: str, context: Dict[str, Any]) -> Dict[str, Any]:
         cv_data = context.get('cv_data', {})
@@ -16,23 +38,17 @@ class KPIAgent(BaseAgent):
                 jd = "Senior AI and Machine Learning Engineer"
             context['job_description'] = jd
 
-        system_prompt = f"""
-        You are an expert HR Specialist and Technical Lead.
-        Your task is to define 3-5 specific Key Performance Indicators (KPIs) for an upcoming interview.
-        
-        Job Description: {jd}
-        Candidate Summary: {cv_data.get('profile', 'Expert in their field')}
-        Top Skills: {", ".join(cv_data.get('skills', [])[:10])}
-        
-        For each KPI:
-        - Name it clearly (e.g., "Architectural Reasoning", "Python Proficiency").
-        - Provide a 1-sentence description of what success looks like.
-        - Set a "Benchmark" based on the candidate's seniority (e.g., "Expected: Senior level architectural design").
+        # KPIs only depend on the CV and the role, so earlier output is reused as is
+        cv_id = context.get('cv_id')
+        jd_hash = hashlib.sha256(jd.encode('utf-8')).hexdigest()[:16]
+        kpis = None
+        if self.db is not None and cv_id is not None:
+            kpis = await asyncio.to_thread(self.db.get_kpis, cv_id, jd_hash)
 
-        Output the KPIs as a clean, numbered list. No extra conversational filler.
-        """
-        
-        kpis = self._call_llm("Generate specific interview KPIs.", system_instruction=system_prompt)
+        if kpis is None:
+            kpis = await self._generate_kpis(jd, cv_data)
+            if self.db is not None and cv_id is not None:
+                await asyncio.to_thread(self.db.set_kpis, cv_id, jd_hash, kpis)
         context['kpis'] = kpis
         
         return {
@@ -41,3 +57,15 @@ class KPIAgent(BaseAgent):
             "context": context,
             "next_state": "INTERVIEW_START"
         }
+
+    async def _generate_kpis(self, jd: str, cv_data: Dict[str, Any]) -> str:
+        # The instructions stay identical across candidates so the provider can cache them
+        dynamic_prompt = DYNAMIC_PROMPT_TEMPLATE.format(
+            jd=jd,
+            profile=cv_data.get('profile', 'Expert in their field'),
+            skills=", ".join(cv_data.get('skills', [])[:10])
+        )
+        kpis = await self._acall_llm(
+            "Generate specific interview KPIs.", STATIC_SYSTEM_PROMPT, dynamic_prompt
+        )
+        return kpis.strip()
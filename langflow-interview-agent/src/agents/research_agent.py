@@ -1,12 +1,75 @@
 from src.agents.base_agent import BaseAgent
-from typing import Dict, Any, List, Tuple
-import json
+import asyncio
+import copy
+import hashlib
+import re
+from typing import Dict, Any, List, Optional, Tuple
+from langchain_core.prompts import ChatPromptTemplate
+from src.schemas import ResearchResult
 from src.serper_service import SerperService
+from src.chain_factory import LLM_SEMAPHORE
+from src.json_utils import dumps_bytes
+from cachetools import TTLCache
+
+_GITHUB_RE = re.compile(r'(?:https?://)?(?:www\.)?github\.com/[a-zA-Z0-9\._\-/]+', re.IGNORECASE)
+_LINKEDIN_RE = re.compile(r'(?:https?://)?(?:www\.)?linkedin\.com/in/[a-zA-Z0-9\._\-/]+', re.IGNORECASE)
+_NO_PROFILE_RE = re.compile(r"don't have|do not have|no github|no linkedin|skip")
+
+# Deep-analysis results keyed by a hash of the inputs, so identical research skips the LLM
+_ANALYSIS_CACHE = TTLCache(maxsize=512, ttl=3600)
+
+# Other names a skill commonly goes by in repo names and descriptions
+_SKILL_ALIASES = {
+    "pytorch": ("torch",),
+    "javascript": ("js", "node", "nodejs"),
+    "typescript": ("ts",),
+    "golang": ("go",),
+    "kubernetes": ("k8s",),
+    "postgresql": ("postgres",),
+    "machine learning": ("ml",),
+    "natural language processing": ("nlp",),
+    "scikit-learn": ("sklearn",),
+}
+# More unevidenced skills than this is treated as ambiguous and left to the LLM
+_MAX_RULE_BASED_GAPS = 5
+
+def find_unverified_skills(skills: List[str], projects: List[Dict]) -> List[str]:
+    """CV skills (in CV order) with no whole-word mention in any project's name, description or language"""
+    evidence = " ".join(
+        f"{p.get('name', '')} {p.get('description', '')} {p.get('language', '')}" if isinstance(p, dict) else str(p)
+        for p in projects
+    ).lower()
+    unverified = []
+    for skill in skills:
+        normalized = str(skill).strip().lower()
+        terms = (normalized,) + _SKILL_ALIASES.get(normalized, ())
+        if not any(re.search(rf"(?<![a-z0-9]){re.escape(term)}(?![a-z0-9])", evidence) for term in terms):
+            unverified.append(skill)
+    return unverified
+
+# Parsed once at import; each analysis only fills in the variables
+_ANALYSIS_PROMPT = ChatPromptTemplate.from_template(
+    """
+            Candidate: {name}
+            Core Skills from CV: {skills}
+            GitHub Profile: {github}
+            LinkedIn Profile: {linkedin}
+            
+            {projects_text}
+            
+            Your task:
+            1. Compare the core skills from the CV against the discovered GitHub projects and overall background.
+            2. Identify which core skills are NOT easily visible or evidenced as projects on their GitHub/Online presence.
+            3. Return the analysis, the unverified skills and the projects found.
+            """
+)
 
 class ResearchAgent(BaseAgent):
     def __init__(self):
         super().__init__("ResearchAgent", "Web Verification and Profile Link Discovery")
         self.serper = SerperService()
+        # Gemini's structured output mode returns a ResearchResult, so no JSON text to parse
+        self.analysis_chain = _ANALYSIS_PROMPT | self.llm.with_structured_output(ResearchResult)
 
     async def process(self, user_input: str, context: Dict[str, Any]) -> Dict[str, Any]:
         cv_data = context.get('cv_data', {})
@@ -27,22 +90,36 @@ class ResearchAgent(BaseAgent):
         linkedin = contact.get('linkedin') or cv_data.get('linkedin')
         name = contact.get('name', 'candidate')
         
-        # Verify existing links if not already verified in this session
+        # Verify existing links if not already verified in this session.
+        # The two checks are independent network calls, so run them concurrently.
+        pending = []
         if github and github != "N/A" and not context.get('github_verified'):
             print(f"[ResearchAgent] Proactively verifying GitHub: {github}")
-            if self.serper.verify_link(github, name):
-                context['github_verified'] = True
-            else:
-                print(f"[ResearchAgent] GitHub verification failed for {github}")
-                # Don't clear it yet, let the missing check handle it if needed
-                # or just proceed with warning
-        
+            pending.append(('github', github))
         if linkedin and linkedin != "N/A" and not context.get('linkedin_verified'):
             print(f"[ResearchAgent] Proactively verifying LinkedIn: {linkedin}")
-            if self.serper.verify_link(linkedin, name):
-                context['linkedin_verified'] = True
-            else:
-                print(f"[ResearchAgent] LinkedIn verification failed for {linkedin}")
+            pending.append(('linkedin', linkedin))
+
+        # With both links on the CV the deep analysis usually follows, so the GitHub repo
+        # fetch it needs runs alongside the verification calls instead of after them
+        prefetched_repos = None
+        if pending:
+            prefetch = bool(github and github != "N/A" and linkedin and linkedin != "N/A")
+            results = await asyncio.gather(
+                *(self.serper.averify_link(url, name) for _, url in pending),
+                *((self.serper.aget_github_repos(github),) if prefetch else ()),
+                return_exceptions=True
+            )
+            if prefetch:
+                repos = results.pop()
+                prefetched_repos = repos if isinstance(repos, list) else None
+            for (platform, url), verified in zip(pending, results):
+                if verified is True:
+                    context[f'{platform}_verified'] = True
+                else:
+                    # Don't clear it yet, let the missing check handle it if needed
+                    # or just proceed with warning
+                    print(f"[ResearchAgent] {platform.capitalize()} verification failed for {url}")
 
         input_lower = user_input.lower()
         
@@ -60,10 +137,10 @@ class ResearchAgent(BaseAgent):
             missing_prompts.append("Verified LinkedIn (the one on your CV couldn't be verified)")
 
         # Handle "I don't have one"
-        if any(phrase in input_lower for phrase in ["don't have", "do not have", "no github", "no linkedin", "skip"]):
+        if _NO_PROFILE_RE.search(input_lower):
             # Fill with placeholder to move past this state
-            if not github: contact['github'] = "N/A"
-            if not linkedin: contact['linkedin'] = "N/A"
+            if not github: self._set_contact(context, contact, 'github', "N/A")
+            if not linkedin: self._set_contact(context, contact, 'linkedin', "N/A")
             return {
                 "response": "I understand. I'll proceed with the information available on your resume. Let's calculate the interview benchmarks.",
                 "agent": self.name,
@@ -73,37 +150,34 @@ class ResearchAgent(BaseAgent):
 
         # If user is providing a link in chat
         if "github.com" in input_lower or "linkedin.com" in input_lower or "http" in input_lower:
-            import re
-            github_pattern = r'(?:https?://)?(?:www\.)?github\.com/[a-zA-Z0-9\._\-/]+'
-            linkedin_pattern = r'(?:https?://)?(?:www\.)?linkedin\.com/in/[a-zA-Z0-9\._\-/]+'
-            
-            github_match = re.search(github_pattern, user_input, re.IGNORECASE)
-            linkedin_match = re.search(linkedin_pattern, user_input, re.IGNORECASE)
+            github_match = _GITHUB_RE.search(user_input)
+            linkedin_match = _LINKEDIN_RE.search(user_input)
             
             extracted_any = False
             verification_errors = []
             
-            if github_match:
-                url = github_match.group(0).rstrip('/')
-                if not url.startswith('http'): url = 'https://' + url
-                if self.serper.verify_link(url, name):
-                    contact['github'] = url
-                    github = url
-                    context['github_verified'] = True
-                    extracted_any = True
-                else:
-                    verification_errors.append(f"GitHub link ({url}) could not be verified for {name}.")
-
-            if linkedin_match:
-                url = linkedin_match.group(0).rstrip('/')
-                if not url.startswith('http'): url = 'https://' + url
-                if self.serper.verify_link(url, name):
-                    contact['linkedin'] = url
-                    linkedin = url
-                    context['linkedin_verified'] = True
+            candidates = []
+            for key, label, match in (('github', 'GitHub', github_match), ('linkedin', 'LinkedIn', linkedin_match)):
+                if match:
+                    url = match.group(0).rstrip('/')
+                    if not url.startswith('http'): url = 'https://' + url
+                    candidates.append((key, label, url))
+
+            results = await asyncio.gather(
+                *(self.serper.averify_link(url, name) for _, _, url in candidates),
+                return_exceptions=True
+            )
+            for (key, label, url), verified in zip(candidates, results):
+                if verified is True:
+                    self._set_contact(context, contact, key, url)
+                    if key == 'github':
+                        github = url
+                    else:
+                        linkedin = url
+                    context[f'{key}_verified'] = True
                     extracted_any = True
                 else:
-                    verification_errors.append(f"LinkedIn link ({url}) could not be verified for {name}.")
+                    verification_errors.append(f"{label} link ({url}) could not be verified for {name}.")
             
             if verification_errors and not extracted_any:
                 return {
@@ -114,8 +188,7 @@ class ResearchAgent(BaseAgent):
 
             if extracted_any:
                 analysis, unverified, projects = await self._perform_deep_analysis(github, linkedin, cv_data)
-                context['unverified_skills'] = unverified
-                context['discovered_projects'] = projects
+                self._store_analysis(context, unverified, projects)
                 return {
                     "response": f"Great! I've verified your profiles. {analysis} Let's proceed to the next step.",
                     "agent": self.name,
@@ -133,9 +206,8 @@ class ResearchAgent(BaseAgent):
             }
         
         # If links are already present and verified
-        analysis, unverified, projects = await self._perform_deep_analysis(github, linkedin, cv_data)
-        context['unverified_skills'] = unverified
-        context['discovered_projects'] = projects
+        analysis, unverified, projects = await self._perform_deep_analysis(github, linkedin, cv_data, prefetched_repos)
+        self._store_analysis(context, unverified, projects)
         return {
             "response": f"I've successfully verified your profiles via web research. {analysis} Based on this, I'll now calculate the Key Performance Indicators for our interview.",
             "agent": self.name,
@@ -143,25 +215,37 @@ class ResearchAgent(BaseAgent):
             "next_state": "KPI_CALCULATION"
         }
 
-    async def _perform_deep_analysis(self, github: str, linkedin: str, cv_data: Dict) -> Tuple[str, List[str], List[Dict]]:
-        """Perform comparison between CV skills and social evidence using LangChain"""
-        from langchain_core.prompts import ChatPromptTemplate
-        from langchain_core.output_parsers import JsonOutputParser
-        try:
-            from langchain_core.pydantic_v1 import BaseModel, Field
-        except ImportError:
-            try:
-                from pydantic.v1 import BaseModel, Field
-            except ImportError:
-                from pydantic import BaseModel, Field
+    @staticmethod
+    def _set_contact(context: Dict[str, Any], contact: Dict, key: str, value: str):
+        """
+        Update a contact field, and remember it in the session: the CV is reloaded from
+        the database every turn, and the *_verified flags refer to these values
+        """
+        contact[key] = value
+        context.setdefault('contact_overrides', {})[key] = value
+
+    def _store_analysis(self, context: Dict[str, Any], unverified: List[str], projects: List[Dict]):
+        """Store research results, along with the derived data the interviewer caches from them"""
+        context['unverified_skills'] = unverified
+        context['discovered_projects'] = projects
+        # The interviewer rebuilds its prompt digest and project lookup from the new list
+        context.pop('_projects_digest', None)
+        context.pop('_project_index', None)
 
+    async def _perform_deep_analysis(self, github: str, linkedin: str, cv_data: Dict,
+                                     real_projects: Optional[List[Dict]] = None) -> Tuple[str, List[str], List[Dict]]:
+        """
+        Perform comparison between CV skills and social evidence using LangChain.
+        real_projects are the already fetched repos for github, if any.
+        """
         name = cv_data.get('contact_information', {}).get('name', 'the candidate')
         skills = cv_data.get('skills', [])
         
         # Real-world verification data
-        real_projects = []
-        if github and github != "N/A":
-            real_projects = self.serper.get_github_repos(github)
+        if real_projects is None:
+            real_projects = []
+            if github and github != "N/A":
+                real_projects = await self.serper.aget_github_repos(github)
         
         projects_text = ""
         if real_projects:
@@ -169,43 +253,37 @@ class ResearchAgent(BaseAgent):
         else:
             projects_text = "No public GitHub projects found during web research."
 
-        # Define schema for output
-        class AnalysisOutput(BaseModel):
-            analysis: str = Field(description="A single encouraging sentence for the user about the research.")
-            unverified_skills: List[str] = Field(description="A list of 1-3 skills from the CV that seem to lack evidence.")
-            discovered_projects: List[Dict] = Field(description="The list of projects found.")
-
-        parser = JsonOutputParser(pydantic_object=AnalysisOutput)
+        # Nothing to compare against without CV skills
+        if not skills:
+            return "I've analyzed your profiles and am ready to proceed.", [], real_projects
 
-        prompt = ChatPromptTemplate.from_template(
-            """
-            Candidate: {name}
-            Core Skills from CV: {skills}
-            GitHub Profile: {github}
-            LinkedIn Profile: {linkedin}
-            
-            {projects_text}
-            
-            Your task:
-            1. Compare the core skills from the CV against the discovered GitHub projects and overall background.
-            2. Identify which core skills are NOT easily visible or evidenced as projects on their GitHub/Online presence.
-            3. Return your analysis in valid JSON format.
-            
-            {format_instructions}
-            """
-        )
+        # The skill gap is a set difference; the LLM is only asked when it's ambiguous
+        unverified = find_unverified_skills(skills, real_projects)
+        if len(unverified) <= _MAX_RULE_BASED_GAPS:
+            if real_projects:
+                analysis = f"Your GitHub projects back up {len(skills) - len(unverified)} of the {len(skills)} core skills on your CV."
+            else:
+                analysis = "I couldn't find public GitHub projects, so we'll cover your skills directly in the interview."
+            return analysis, unverified[:3], real_projects
 
-        chain = prompt | self.llm | parser
+        cache_key = hashlib.sha256(
+            dumps_bytes([name, github, linkedin, skills, real_projects], sort_keys=True)
+        ).hexdigest()
+        cached = _ANALYSIS_CACHE.get(cache_key)
+        if cached is not None:
+            print("[ResearchAgent] Reusing cached deep analysis")
+            return copy.deepcopy(cached)
 
         try:
-            data = await chain.ainvoke({
-                "name": name,
-                "skills": ", ".join(skills),
-                "github": github,
-                "linkedin": linkedin,
-                "projects_text": projects_text,
-                "format_instructions": parser.get_format_instructions()
-            })
+            async with LLM_SEMAPHORE:
+                output = await self.analysis_chain.ainvoke({
+                    "name": name,
+                    "skills": ", ".join(skills),
+                    "github": github,
+                    "linkedin": linkedin,
+                    "projects_text": projects_text
+                })
+            data = output.model_dump() if output is not None else {}
             
             final_projects = data.get("discovered_projects", [])
             
@@ -219,7 +297,9 @@ class ResearchAgent(BaseAgent):
             if not normalized_projects and real_projects:
                 normalized_projects = real_projects
 
-            return data.get("analysis", ""), data.get("unverified_skills", []), normalized_projects
+            result = (data.get("analysis", ""), data.get("unverified_skills", []), normalized_projects)
+            _ANALYSIS_CACHE[cache_key] = copy.deepcopy(result)
+            return result
         except Exception as e:
             print(f"Error parsing deep analysis: {e}")
             return "I've analyzed your profiles and am ready to proceed.", [], real_projects
@@ -1,13 +1,30 @@
+import asyncio
+import functools
+import os
 from langchain_google_genai import ChatGoogleGenerativeAI
 from src.config import API_KEY
 
-def get_llm(model_name="gemini-2.0-flash-lite", temperature=0.7):
+DEFAULT_MODEL = "gemini-2.0-flash-lite"
+
+# Upper bound on async LLM requests in flight from this process, so concurrent
+# sessions (e.g. a batch of chat turns) stay inside the provider's rate limits
+LLM_SEMAPHORE = asyncio.Semaphore(int(os.getenv("LLM_MAX_CONCURRENCY", "8")))
+
+def get_llm(model_name=DEFAULT_MODEL, temperature=0.7):
     """
     Factory method to get a configured ChatGoogleGenerativeAI instance.
+    Instances are memoized per (model, temperature) so every agent shares one
+    client; the client holds no per-call state and is safe for concurrent ainvoke.
     """
+    # lru_cache keys keyword and positional calls differently, so normalize the
+    # arguments first; get_llm(temperature=0.1) and get_llm(DEFAULT_MODEL, 0.1) share one client
+    return _build_llm(model_name, float(temperature))
+
+@functools.lru_cache(maxsize=8)
+def _build_llm(model_name, temperature):
     if not API_KEY:
         raise ValueError("GEMINI_API_KEY not found in configuration.")
-    
+
     return ChatGoogleGenerativeAI(
         model=model_name,
         google_api_key=API_KEY,
@@ -1,40 +1,84 @@
-import google.generativeai as genai
 import PyPDF2
+import asyncio
+import copy
+import hashlib
 import json
+import multiprocessing
+import os
+import re
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, List, Optional
+from cachetools import LRUCache
 from src.config import API_KEY
 from src.serper_service import SerperService
+from src.json_utils import dumps, loads
 
-class GeminiParser:
-    def __init__(self):
-        if not API_KEY:
-            raise ValueError("API key is required")
-        genai.configure(api_key=API_KEY)
-        self.model = genai.GenerativeModel('gemini-2.5-flash-lite')
-        self.serper = SerperService()
+try:
+    import fitz
+except ImportError:
+    fitz = None
 
-    def extract_text_from_pdf(self, pdf_content: bytes) -> str:
-        import io
-        text = ""
-        try:
-            pdf_file = io.BytesIO(pdf_content)
-            pdf_reader = PyPDF2.PdfReader(pdf_file)
-            for page in pdf_reader.pages:
-                text += page.extract_text()
-            return text
-        except Exception as e:
-            print(f"Error reading PDF: {e}")
-            return ""
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
 
-    def parse_cv(self, pdf_content: bytes) -> dict:
-        cv_text = self.extract_text_from_pdf(pdf_content)
-        if not cv_text:
-            return {"error": "Could not extract text from CV"}
+# Profile links in the raw text, all kinds in one pass. They are handed to Gemini as
+# known links and fill the fields it leaves empty. The github.io name only starts at a
+# word boundary: otherwise every position inside a long run of word characters rescans
+# the rest of it, which is quadratic on unbroken text
+_URL_RE = re.compile(
+    r'(?:https?://)?(?:www\.)?(?:linkedin\.com/in/([\w\-]+)|github\.com/([\w\-]+)|(?<![\w\-])([\w\-]+)\.github\.io)',
+    re.IGNORECASE
+)
 
-        prompt = f"""Analyze the following resume and extract all information in JSON format.
-Be extremely thorough and extract all available information, especially social media and portfolio links.
+# Structurally canonical profile URLs are trusted without a Serper round trip
+# (with or without the scheme; they are normalized to https)
+_CANONICAL_RE = {
+    "linkedin": re.compile(r'^(?:https?://)?((?:www\.)?linkedin\.com/in/[A-Za-z0-9_\-]+)/?$', re.IGNORECASE),
+    "github": re.compile(r'^(?:https?://)?((?:www\.)?github\.com/[A-Za-z0-9_\-]+)/?$', re.IGNORECASE),
+}
+
+# Top-level github.com paths that are GitHub's own pages, not user or org profiles
+_GITHUB_RESERVED = frozenset({
+    "about", "account", "apps", "blog", "business", "codespaces", "collections", "contact",
+    "copilot", "customer-stories", "dashboard", "discussions", "education", "enterprise",
+    "events", "explore", "features", "gist", "home", "issues", "join", "login", "logout",
+    "marketplace", "new", "notifications", "open-source", "organizations", "orgs", "pricing",
+    "pulls", "readme", "resources", "search", "security", "sessions", "settings", "signup",
+    "site", "solutions", "sponsors", "stars", "team", "teams", "topics", "trending", "users",
+})
+
+def _canonical_link(platform: str, link) -> Optional[str]:
+    """https form of a structurally canonical profile link, or None"""
+    match = _CANONICAL_RE[platform].match(link.strip()) if isinstance(link, str) else None
+    if not match:
+        return None
+    if platform == "github" and match.group(1).rsplit("/", 1)[-1].lower() in _GITHUB_RESERVED:
+        return None
+    return f"https://{match.group(1)}"
+
+_PLATFORMS = ("linkedin", "github")
+# PDFs with at least this many pages are extracted in page ranges across worker processes
+# (MuPDF isn't thread-safe); shorter ones aren't worth the hand-off
+_PARALLEL_MIN_PAGES = 3
+_PAGE_WORKERS = os.cpu_count() or 1
 
-Resume Text:
-{cv_text}
+# Resumes per batched Gemini request; each parse is a sizeable JSON object, so larger
+# batches risk running into the model's output token limit
+_BATCH_SIZE = 4
+
+# First markdown-fenced block in a model response (an unterminated fence runs to the end)
+_FENCE_RE = re.compile(r'```(?:json)?\s*(.*?)\s*(?:```|\Z)', re.S)
+
+# Extraction instructions and schema. They are the same for every CV, so they go first
+# and the resume text follows as a per-call suffix
+_PARSE_INSTRUCTIONS = """Analyze the following resume and extract all information in JSON format.
+Be extremely thorough and extract all available information, especially social media and portfolio links.
 
 Search for URLs and social media profiles even if they are not explicitly labeled. 
 Look for patterns like:
@@ -46,18 +90,18 @@ Look for patterns like:
 Even if the "https://" part is missing (e.g., "linkedin.com/in/arjunmehta"), you MUST extract it and convert it to a full URL (e.g., "https://linkedin.com/in/arjunmehta").
 
 Return the extracted information as valid JSON with this exact structure:
-{{
-    "contact_information": {{
+{
+    "contact_information": {
         "name": "string or null",
         "email": "string or null",
         "phone": "string or null",
         "address": "string or null",
         "linkedin": "string or null",
         "github": "string or null"
-    }},
+    },
     "profile": "string or null",
     "employment_history": [
-        {{
+        {
             "title": "string",
             "company": "string",
             "location": "string or null",
@@ -65,10 +109,10 @@ Return the extracted information as valid JSON with this exact structure:
             "end_date": "string or null",
             "description": "string or null",
             "achievements": ["string"]
-        }}
+        }
     ],
     "education": [
-        {{
+        {
             "degree": "string",
             "institution": "string",
             "location": "string or null",
@@ -76,7 +120,7 @@ Return the extracted information as valid JSON with this exact structure:
             "end_date": "string or null",
             "majors": ["string"],
             "minors": ["string"]
-        }}
+        }
     ],
     "skills": ["string"],
     "certifications": ["string"],
@@ -84,95 +128,481 @@ Return the extracted information as valid JSON with this exact structure:
     "languages": ["string"],
     "achievements": ["string"],
     "hobbies": ["string"]
-}}
+}
 
 Return ONLY the JSON, no markdown or extra text. Ensure all URLs are absolute (e.g., https://github.com/...) if possible."""
 
+_PARSER_MODEL = 'gemini-2.5-flash-lite'
+
+@lru_cache(maxsize=1)
+def _page_pool() -> ProcessPoolExecutor:
+    """
+    Worker processes for page-parallel extraction, started on first use and kept for reuse.
+    Never forked from the server process: it has threads (sqlite, httpx, gRPC) whose held
+    locks a forked child would inherit, so workers come from a forkserver (spawn on Windows).
+    """
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return ProcessPoolExecutor(max_workers=_PAGE_WORKERS, mp_context=multiprocessing.get_context(method))
+
+def shutdown_page_pool():
+    """Stop the extraction workers, if any were started (call on app shutdown)"""
+    if _page_pool.cache_info().currsize:
+        _page_pool().shutdown()
+        _page_pool.cache_clear()
+
+def _extract_pages(shm_name: str, size: int, start: int, stop: int) -> List[str]:
+    """
+    Text of pages [start, stop) of the PDF in shared memory block shm_name; top-level
+    so the process pool can run it. The parent owns (and unlinks) the block.
+    """
+    shm = SharedMemory(name=shm_name)
+    try:
+        pdf_content = bytes(shm.buf[:size])
+    finally:
+        shm.close()
+    with fitz.open(stream=pdf_content, filetype="pdf") as doc:
+        return [doc[i].get_text("text") for i in range(start, stop)]
+
+@lru_cache(maxsize=1)
+def _genai():
+    """
+    google.generativeai, imported and configured on first use. It pulls in protobuf and
+    gRPC, so importing this module (e.g. for text extraction alone) stays cheap.
+    """
+    import google.generativeai as genai
+    genai.configure(api_key=API_KEY)
+    return genai
+
+@lru_cache(maxsize=4)
+def _get_model(model_name: str = _PARSER_MODEL):
+    """Process-wide Gemini model per name, shared by every parser instance"""
+    return _genai().GenerativeModel(model_name)
+
+def find_profile_links(cv_text: str) -> Dict[str, str]:
+    """First LinkedIn, GitHub and github.io links in a resume text, as absolute URLs"""
+    links = {}
+    for linkedin, github, pages in _URL_RE.findall(cv_text):
+        if linkedin:
+            links.setdefault("linkedin", f"https://www.linkedin.com/in/{linkedin}")
+        elif github:
+            # github.com/features, /topics, ... (with or without a scheme) are GitHub pages, not the candidate
+            if github.lower() not in _GITHUB_RESERVED:
+                links.setdefault("github", f"https://github.com/{github}")
+        else:
+            links.setdefault("website", f"https://{pages}.github.io")
+    return links
+
+def _resume_prompt(cv_text: str) -> str:
+    links = find_profile_links(cv_text)
+    if not links:
+        return f"Resume Text:\n{cv_text}"
+    return f"Known links (found in the text, use them as is): {dumps(links)}\n\nResume Text:\n{cv_text}"
+
+def _batch_prompt(cv_texts: List[str]) -> str:
+    sections = "".join(f"---RESUME {i}---\n{_resume_prompt(text)}\n" for i, text in enumerate(cv_texts, 1))
+    return (
+        f"The text below holds {len(cv_texts)} resumes, each starting with a ---RESUME n--- line. "
+        "Return a JSON array with one object per resume, in order, each with the structure above.\n\n"
+        + sections
+    )
+
+def _full_prompt(suffix: str) -> str:
+    return f"{_PARSE_INSTRUCTIONS}\n\n{suffix}"
+
+def _text_key(cv_text: str) -> str:
+    """Hash of the resume text with case and whitespace folded"""
+    normalized = " ".join(cv_text.lower().split())
+    return hashlib.blake2b(normalized.encode(), digest_size=16).hexdigest()
+
+def _closed_contact(partial: str) -> Optional[dict]:
+    """contact_information from a partial JSON response, once its closing brace has arrived"""
+    key = partial.find('"contact_information"')
+    start = partial.find("{", key) if key >= 0 else -1
+    if start < 0:
+        return None
+    depth, in_string, escaped = 0, False, False
+    for i in range(start, len(partial)):
+        ch = partial[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                try:
+                    contact = loads(partial[start:i + 1])
+                except ValueError:
+                    return None
+                return contact if isinstance(contact, dict) else None
+    return None
+
+def _strip_fence(response_text: str) -> str:
+    fence = _FENCE_RE.search(response_text)
+    return fence.group(1) if fence else response_text.strip()
+
+class GeminiParser:
+    def __init__(self, cache_path: str = "data/parse_cache.db", model_name: str = _PARSER_MODEL):
+        if not API_KEY:
+            raise ValueError("API key is required")
+        self.model_name = model_name
+        self.model = _get_model(model_name)
+        self.serper = SerperService()
+        
+        # Parsed results keyed by PDF content hash, so re-uploads skip extraction and Gemini
+        self._text_cache = LRUCache(maxsize=32)
+        self._cache_lock = threading.Lock()
+        os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+        self._cache_conn = sqlite3.connect(cache_path, check_same_thread=False)
+        self._cache_conn.execute(
+            'CREATE TABLE IF NOT EXISTS parse_cache (hash TEXT PRIMARY KEY, json TEXT NOT NULL)'
+        )
+        self._cache_conn.commit()
+        # Parses keyed by normalized text, so a re-exported PDF of the same resume reuses one
+        self._text_parse_cache = LRUCache(maxsize=1024)
+
+    def _get_cached_parse(self, digest: str):
+        with self._cache_lock:
+            row = self._cache_conn.execute(
+                'SELECT json FROM parse_cache WHERE hash = ?', (digest,)
+            ).fetchone()
+        return loads(row[0]) if row else None
+
+    def _store_parse(self, digest: str, parsed_data: dict):
+        with self._cache_lock:
+            self._cache_conn.execute(
+                'INSERT OR REPLACE INTO parse_cache (hash, json) VALUES (?, ?)',
+                (digest, dumps(parsed_data))
+            )
+            self._cache_conn.commit()
+
+    def _extract_text_cached(self, digest: str, pdf_content: bytes) -> str:
+        """extract_text_from_pdf memoized on the content hash (bytes are too big to key on directly)"""
+        with self._cache_lock:
+            text = self._text_cache.get(digest)
+        if text is None:
+            text = self.extract_text_from_pdf(pdf_content)
+            if text:
+                with self._cache_lock:
+                    self._text_cache[digest] = text
+        return text
+
+    def _extract_text_pymupdf(self, pdf_content: bytes) -> str:
+        """PyMuPDF (MuPDF, C) text extraction, the fastest of the available backends"""
+        # Default flags on purpose: they clip to the media box (no off-page keyword stuffing)
+        # and let MuPDF insert spaces between positioned words (LaTeX CVs)
+        with fitz.open(stream=pdf_content, filetype="pdf") as doc:
+            page_count = doc.page_count
+            if page_count < _PARALLEL_MIN_PAGES or _PAGE_WORKERS < 2:
+                return "\n".join(page.get_text("text") for page in doc)
+
+        # One contiguous page range per worker, so each process opens the document once;
+        # map() yields the ranges back in page order. The PDF is handed over once through
+        # shared memory instead of being pickled to every worker
+        step = -(-page_count // min(_PAGE_WORKERS, page_count))
+        starts = range(0, page_count, step)
+        size = len(pdf_content)
+        shm = SharedMemory(create=True, size=size)
         try:
-            response = self.model.generate_content(prompt)
+            shm.buf[:size] = pdf_content
+            chunks = list(_page_pool().map(
+                _extract_pages,
+                [shm.name] * len(starts), [size] * len(starts), starts,
+                [min(start + step, page_count) for start in starts]
+            ))
+        finally:
+            shm.close()
+            shm.unlink()
+        return "\n".join(text for chunk in chunks for text in chunk)
+
+    def _extract_text_pdfium(self, pdf_content: bytes) -> str:
+        """PDFium (C++) text extraction; much faster than PyPDF2's pure-Python glyph walk"""
+        parts = []
+        pdf = pdfium.PdfDocument(pdf_content)
+        try:
+            for page in pdf:
+                textpage = page.get_textpage()
+                try:
+                    parts.append(textpage.get_text_range())
+                finally:
+                    textpage.close()
+                    page.close()
+        finally:
+            pdf.close()
+        return "".join(parts)
+
+    def extract_text_from_pdf(self, pdf_content: bytes) -> str:
+        import io
+        if fitz is not None:
+            try:
+                return self._extract_text_pymupdf(pdf_content)
+            except Exception as e:
+                print(f"[GeminiParser] PyMuPDF failed, falling back: {e}")
+        if pdfium is not None:
             try:
-                cleaned_text = response.text.strip()
-                if cleaned_text.startswith("```"):
-                    cleaned_text = cleaned_text.split("```")[1]
-                    if cleaned_text.startswith("json"):
-                        cleaned_text = cleaned_text[4:]
-                cleaned_text = cleaned_text.strip()
-                parsed_data = json.loads(cleaned_text)
-                
-                # --- Regex-based Fallback for Links ---
-                if "contact_information" not in parsed_data:
-                    parsed_data["contact_information"] = {}
-                
-                contact = parsed_data["contact_information"]
-                
-                import re
-                
-                # LinkedIn Regex
-                if not contact.get("linkedin"):
-                    li_match = re.search(r'(?:linkedin\.com/in/)([a-zA-Z0-9\-\_]+)', cv_text)
-                    if li_match:
-                        contact["linkedin"] = f"https://www.linkedin.com/in/{li_match.group(1)}"
-                        print(f"[GeminiParser] Found LinkedIn via regex: {contact['linkedin']}")
-                
-                # GitHub Regex
-                if not contact.get("github"):
-                    gh_match = re.search(r'(?:github\.com/)([a-zA-Z0-9\-\_]+)', cv_text)
-                    if gh_match:
-                        contact["github"] = f"https://github.com/{gh_match.group(1)}"
-                        print(f"[GeminiParser] Found GitHub via regex: {contact['github']}")
-                
-                # --- Link Verification and Fallback ---
-                contact = parsed_data.get("contact_information", {})
-                name = contact.get("name")
-                
-                if name:
-                    # Validate existing LinkedIn
-                    if contact.get("linkedin"):
-                        print(f"[GeminiParser] Verifying extracted LinkedIn: {contact['linkedin']}")
-                        is_valid = self.serper.verify_link(contact["linkedin"], name)
-                        if not is_valid:
-                            print(f"[GeminiParser] Extracted LinkedIn failed verification. Searching for correct one...")
-                            found_linkedin = self.serper.search_profile(name, "linkedin")
-                            if found_linkedin:
-                                contact["linkedin"] = found_linkedin
-                            else:
-                                contact["linkedin_verified"] = False
-                        else:
-                            contact["linkedin_verified"] = True
-                    else:
-                        # Fallback if missing
-                        print(f"[GeminiParser] LinkedIn missing for {name}, trying Serper...")
-                        found_linkedin = self.serper.search_profile(name, "linkedin")
-                        if found_linkedin:
-                            contact["linkedin"] = found_linkedin
-                            contact["linkedin_verified"] = True
-                    
-                    # Validate existing GitHub
-                    if contact.get("github"):
-                        print(f"[GeminiParser] Verifying extracted GitHub: {contact['github']}")
-                        is_valid = self.serper.verify_link(contact["github"], name)
-                        if not is_valid:
-                            print(f"[GeminiParser] Extracted GitHub failed verification. Searching for correct one...")
-                            found_github = self.serper.search_profile(name, "github")
-                            if found_github:
-                                contact["github"] = found_github
-                            else:
-                                contact["github_verified"] = False
-                        else:
-                            contact["github_verified"] = True
-                    else:
-                        # Fallback if missing
-                        print(f"[GeminiParser] GitHub missing for {name}, trying Serper...")
-                        found_github = self.serper.search_profile(name, "github")
-                        if found_github:
-                            contact["github"] = found_github
-                            contact["github_verified"] = True
-                            
-                    parsed_data["contact_information"] = contact
-                # ------------------------------------
-
-                return parsed_data
-            except json.JSONDecodeError as e:
-                return {"error": f"Failed to parse JSON response: {str(e)}"}
+                return self._extract_text_pdfium(pdf_content)
+            except Exception as e:
+                print(f"[GeminiParser] pypdfium2 failed, falling back to PyPDF2: {e}")
+        try:
+            pdf_file = io.BytesIO(pdf_content)
+            pdf_reader = PyPDF2.PdfReader(pdf_file)
+            return "".join(page.extract_text() or "" for page in pdf_reader.pages)
+        except Exception as e:
+            print(f"Error reading PDF: {e}")
+            return ""
+
+    def _verify_and_search(self, platform: str, link, name: str) -> dict:
+        """
+        Verify an extracted profile link, or search Serper for one when it is missing or fails.
+        Returns the contact fields to update for this platform.
+        """
+        label = "LinkedIn" if platform == "linkedin" else "GitHub"
+        canonical = _canonical_link(platform, link)
+        if canonical:
+            return {platform: canonical, f"{platform}_verified": True}
+        if link:
+            print(f"[GeminiParser] Verifying extracted {label}: {link}")
+            if self.serper.verify_link(link, name):
+                return {f"{platform}_verified": True}
+            print(f"[GeminiParser] Extracted {label} failed verification. Searching for correct one...")
+            found = self.serper.search_profile(name, platform)
+            return {platform: found} if found else {f"{platform}_verified": False}
+        
+        # Fallback if missing
+        print(f"[GeminiParser] {label} missing for {name}, trying Serper...")
+        found = self.serper.search_profile(name, platform)
+        return {platform: found, f"{platform}_verified": True} if found else {}
+
+    async def _averify_and_search(self, platform: str, link, name: str) -> dict:
+        """Async _verify_and_search over SerperService's pooled client"""
+        label = "LinkedIn" if platform == "linkedin" else "GitHub"
+        canonical = _canonical_link(platform, link)
+        if canonical:
+            return {platform: canonical, f"{platform}_verified": True}
+        if link:
+            print(f"[GeminiParser] Verifying extracted {label}: {link}")
+            if await self.serper.averify_link(link, name):
+                return {f"{platform}_verified": True}
+            print(f"[GeminiParser] Extracted {label} failed verification. Searching for correct one...")
+            found = await self.serper.asearch_profile(name, platform)
+            return {platform: found} if found else {f"{platform}_verified": False}
+        
+        print(f"[GeminiParser] {label} missing for {name}, trying Serper...")
+        found = await self.serper.asearch_profile(name, platform)
+        return {platform: found, f"{platform}_verified": True} if found else {}
+
+    def _prepare(self, pdf_content: bytes):
+        """
+        Hash and extract the PDF. Returns (digest, cv_text, result) where result is
+        a cached parse or an error dict when no Gemini call is needed.
+        """
+        digest = hashlib.blake2b(pdf_content, digest_size=16).hexdigest()
+        cached = self._get_cached_parse(digest)
+        if cached is not None:
+            print(f"[GeminiParser] Using cached parse for {digest}")
+            return digest, None, cached
+        
+        cv_text = self._extract_text_cached(digest, pdf_content)
+        if not cv_text:
+            return digest, None, {"error": "Could not extract text from CV"}
+
+        with self._cache_lock:
+            same_text = self._text_parse_cache.get(_text_key(cv_text))
+        if same_text is not None:
+            print(f"[GeminiParser] Using parse of identical resume text for {digest}")
+            return digest, None, copy.deepcopy(same_text)
+        return digest, cv_text, None
+
+    def _generate(self, suffix: str):
+        return self.model.generate_content(_full_prompt(suffix))
+
+    async def _agenerate(self, suffix: str, stream: bool = False):
+        return await self.model.generate_content_async(_full_prompt(suffix), stream=stream)
+
+    def parse_cv(self, pdf_content: bytes) -> dict:
+        digest, cv_text, result = self._prepare(pdf_content)
+        if result is not None:
+            return result
+
+        try:
+            response = self._generate(_resume_prompt(cv_text))
+            return self._finish_parse(digest, cv_text, response.text)
+        except Exception as e:
+            return {"error": str(e)}
+
+    async def aparse_cv(self, pdf_content: bytes) -> dict:
+        """parse_cv using the async Gemini client; blocking steps run in worker threads"""
+        digest, cv_text, result = await asyncio.to_thread(self._prepare, pdf_content)
+        if result is not None:
+            return result
+        return await self._aparse_text(digest, cv_text)
+
+    async def _aparse_text(self, digest: str, cv_text: str) -> dict:
+        """
+        Streams Gemini's answer. Contact details come first in the schema, so the Serper
+        lookups start as soon as that object is complete, while the rest is still generating.
+        """
+        lookups = None
+        try:
+            response = await self._agenerate(_resume_prompt(cv_text), stream=True)
+            parts = []
+            async for chunk in response:
+                parts.append(chunk.text)
+                if lookups is None:
+                    contact = _closed_contact("".join(parts))
+                    if contact is not None:
+                        lookups = self._start_lookups(cv_text, contact)
+            return await self._afinish_parse(digest, cv_text, "".join(parts), lookups)
         except Exception as e:
             return {"error": str(e)}
+        finally:
+            # Lookups the final parse didn't use (or a failed parse left behind)
+            for task in (lookups or {}).values():
+                task.cancel()
+
+    def _start_lookups(self, cv_text: str, contact: dict) -> dict:
+        """Serper tasks for a streamed contact object, keyed by (platform, link, name)"""
+        contact = self._fill_links(cv_text, {"contact_information": dict(contact)})["contact_information"]
+        name = contact.get("name")
+        if not name:
+            return {}
+        return {
+            (platform, contact.get(platform), name): asyncio.create_task(
+                self._averify_and_search(platform, contact.get(platform), name)
+            )
+            for platform in _PLATFORMS
+        }
+
+    async def _agenerate_batch(self, cv_texts: List[str]) -> Optional[List[dict]]:
+        """One Gemini request for several resumes; the raw entries in order, or None if the answer doesn't line up"""
+        try:
+            response = await self._agenerate(_batch_prompt(cv_texts))
+            entries = loads(_strip_fence(response.text))
+        except Exception as e:
+            print(f"[GeminiParser] Batched parse failed, parsing resumes one by one: {e}")
+            return None
+        if not isinstance(entries, list) or len(entries) != len(cv_texts) or not all(isinstance(entry, dict) for entry in entries):
+            print("[GeminiParser] Batched parse returned the wrong shape, parsing resumes one by one")
+            return None
+        return entries
+
+    async def parse_cvs(self, pdf_list: List[bytes], max_concurrency: int = 8,
+                        batch_size: int = _BATCH_SIZE) -> List[dict]:
+        """
+        Parse many PDFs, results in input order. Cached and unreadable PDFs are answered
+        without Gemini; the rest go batch_size resumes per request, with at most
+        max_concurrency requests in flight.
+        """
+        # Text extraction is blocking; run every PDF's in the default thread pool at once
+        prepared = await asyncio.gather(*(asyncio.to_thread(self._prepare, pdf) for pdf in pdf_list))
+        results = [result for _, _, result in prepared]
+        pending = [i for i, result in enumerate(results) if result is None]
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def _single(i: int) -> dict:
+            async with semaphore:
+                return await self._aparse_text(*prepared[i][:2])
+
+        async def _entry(i: int, entry: dict) -> dict:
+            digest, cv_text, _ = prepared[i]
+            try:
+                return await self._afinalize(digest, cv_text, self._fill_links(cv_text, entry))
+            except Exception as e:
+                return {"error": str(e)}
+
+        async def _batch(batch: List[int]) -> List[dict]:
+            if len(batch) > 1:
+                async with semaphore:
+                    entries = await self._agenerate_batch([prepared[i][1] for i in batch])
+                if entries is not None:
+                    return await asyncio.gather(*(_entry(i, entry) for i, entry in zip(batch, entries)))
+            return await asyncio.gather(*(_single(i) for i in batch))
+
+        batches = [pending[start:start + batch_size] for start in range(0, len(pending), batch_size)]
+        for batch, outputs in zip(batches, await asyncio.gather(*(_batch(batch) for batch in batches))):
+            for i, output in zip(batch, outputs):
+                results[i] = output
+        return results
+
+    def _decode_parse(self, cv_text: str, response_text: str) -> dict:
+        """Decode Gemini's JSON and fill in profile links it missed from the raw text"""
+        return self._fill_links(cv_text, loads(_strip_fence(response_text)))
+
+    def _fill_links(self, cv_text: str, parsed_data: dict) -> dict:
+        # --- Regex-based Fallback for Links ---
+        if "contact_information" not in parsed_data:
+            parsed_data["contact_information"] = {}
+        
+        contact = parsed_data["contact_information"]
+        links = find_profile_links(cv_text)
+        for platform in _PLATFORMS:
+            if not contact.get(platform) and platform in links:
+                contact[platform] = links[platform]
+                print(f"[GeminiParser] Found {platform} via regex: {contact[platform]}")
+        return parsed_data
+
+    def _store_result(self, digest: str, cv_text: str, parsed_data: dict):
+        self._store_parse(digest, parsed_data)
+        with self._cache_lock:
+            self._text_parse_cache[_text_key(cv_text)] = copy.deepcopy(parsed_data)
+
+    def _finish_parse(self, digest: str, cv_text: str, response_text: str) -> dict:
+        """Decode Gemini's JSON, fill in and verify profile links, and cache the result"""
+        try:
+            parsed_data = self._decode_parse(cv_text, response_text)
+        except json.JSONDecodeError as e:
+            return {"error": f"Failed to parse JSON response: {str(e)}"}
+
+        # --- Link Verification and Fallback ---
+        contact = parsed_data["contact_information"]
+        name = contact.get("name")
+        if name:
+            # LinkedIn and GitHub checks are independent network round trips; run them side by side
+            with ThreadPoolExecutor(max_workers=len(_PLATFORMS)) as executor:
+                futures = [
+                    executor.submit(self._verify_and_search, platform, contact.get(platform), name)
+                    for platform in _PLATFORMS
+                ]
+                for future in futures:
+                    contact.update(future.result())
+
+        self._store_result(digest, cv_text, parsed_data)
+        return parsed_data
+
+    async def _afinish_parse(self, digest: str, cv_text: str, response_text: str,
+                             lookups: Optional[dict] = None) -> dict:
+        """_finish_parse with both link lookups awaited together on the async Serper client"""
+        try:
+            parsed_data = self._decode_parse(cv_text, response_text)
+        except json.JSONDecodeError as e:
+            return {"error": f"Failed to parse JSON response: {str(e)}"}
+        return await self._afinalize(digest, cv_text, parsed_data, lookups)
+
+    async def _afinalize(self, digest: str, cv_text: str, parsed_data: dict,
+                         lookups: Optional[dict] = None) -> dict:
+        """
+        Verify or look up the decoded parse's profile links, then cache it.
+        lookups are already started tasks (from _start_lookups); one is used when its
+        link and name match the final parse.
+        """
+        contact = parsed_data["contact_information"]
+        name = contact.get("name")
+        if name:
+            lookups = lookups if lookups is not None else {}
+            updates = await asyncio.gather(
+                *(lookups.pop((platform, contact.get(platform), name), None)
+                  or self._averify_and_search(platform, contact.get(platform), name)
+                  for platform in _PLATFORMS)
+            )
+            for update in updates:
+                contact.update(update)
+
+        await asyncio.to_thread(self._store_result, digest, cv_text, parsed_data)
+        return parsed_data
@@ -1,9 +1,24 @@
 from typing import Annotated, Any, Dict, List, Optional, TypedDict
-from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage, AIMessage
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage, AIMessage, RemoveMessage
 from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import add_messages
 from src.chain_factory import get_llm, get_fast_llm
-import json
+from cachetools import LRUCache
+from src.json_utils import loads
+from contextlib import asynccontextmanager
+import functools
+import hashlib
+import os
+import re
+
+# Deterministic routing signals checked before asking the supervisor LLM
+_GREET_RE = re.compile(r"\b(?:hi|hello|hey)\b", re.IGNORECASE)
+_LINK_RE = re.compile(r"github\.com|linkedin\.com", re.IGNORECASE)
+_FINISH_RE = re.compile(r"finish the interview", re.IGNORECASE)
+# Supervisor decision: a fenced JSON object if present, otherwise the outermost bare object
+_JSON_FENCE = re.compile(r"```(?:json)?\s*(\{.*?\})\s*```|(\{.*\})", re.DOTALL)
+# Recent messages the supervisor sees; state keeps twice that, older ones are dropped
+_WINDOW = 12
 
 # Define the state object for the entire graph
 class InterviewTeamState(TypedDict):
@@ -38,14 +53,28 @@ def create_supervisor_node(llm):
 
     Response must be a JSON object with a single key 'next' containing one of: {options}"""
 
+    # LLM decisions keyed by a hash of the last two messages, for repeated turns
+    decision_cache = LRUCache(maxsize=256)
+
     async def supervisor_node(state: InterviewTeamState) -> Dict[str, Any]:
-        messages = [SystemMessage(content=system_prompt)] + state["messages"]
+        decision = route_deterministically(state)
+        if decision:
+            return {"next_node": decision}
+
+        key = _recent_messages_key(state["messages"])
+        decision = decision_cache.get(key)
+        if decision:
+            return {"next_node": decision}
+
+        messages = [SystemMessage(content=system_prompt), *state["messages"][-_WINDOW:]]
         response = await llm.ainvoke(messages)
         
         # Parse the decision
         try:
-            content = response.content.strip().replace("```json", "").replace("```", "")
-            decision = json.loads(content).get("next", "RESEARCH")
+            match = _JSON_FENCE.search(response.content)
+            payload = (match.group(1) or match.group(2)) if match else response.content
+            decision = loads(payload).get("next", "RESEARCH")
+            decision_cache[key] = decision
         except:
             decision = "RESEARCH" # Default fallback
             
@@ -53,6 +82,40 @@ def create_supervisor_node(llm):
     
     return supervisor_node
 
+def route_deterministically(state: InterviewTeamState) -> Optional[str]:
+    """
+    Next node when the state and last message settle it without the LLM
+    (the same rules Orchestrator.route applies), or None if it's ambiguous.
+    """
+    messages = state["messages"]
+    if not messages:
+        return "GREETING"
+    last = messages[-1]
+
+    # Final feedback has been given: the session is over
+    if isinstance(last, AIMessage):
+        return "FINISH" if last.name == "FeedbackWorker" else None
+
+    text = last.content if isinstance(last.content, str) else ""
+    if _LINK_RE.search(text):
+        return "RESEARCH"
+    if _FINISH_RE.search(text):
+        return "FEEDBACK"
+    if len(messages) < 3 and _GREET_RE.search(text):
+        return "GREETING"
+    return None
+
+def _recent_messages_key(messages: List[BaseMessage]) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    for message in messages[-2:]:
+        digest.update(f"{message.type}\0{getattr(message, 'name', None)}\0{message.content}\0".encode("utf-8"))
+    return digest.hexdigest()
+
+def _trim_history(messages: List[BaseMessage]) -> List[BaseMessage]:
+    """RemoveMessage markers for all but the newest _WINDOW * 2 - 1 messages (the reply makes it _WINDOW * 2)"""
+    excess = len(messages) - (_WINDOW * 2 - 1)
+    return [RemoveMessage(id=m.id) for m in messages[:excess] if m.id] if excess > 0 else []
+
 # Generic Node Wrapper for existing Agents
 def create_worker_node(agent_instance, name):
     async def worker_node(state: InterviewTeamState) -> Dict[str, Any]:
@@ -71,9 +134,9 @@ def create_worker_node(agent_instance, name):
         # Process via existing agent logic
         result = await agent_instance.process(user_input, context)
         
-        # Update graph state
+        # Update graph state, trimming history so checkpoints stay small
         return {
-            "messages": [AIMessage(content=result["response"], name=name)],
+            "messages": _trim_history(state["messages"]) + [AIMessage(content=result["response"], name=name)],
             "cv_data": result["context"].get("cv_data", state["cv_data"]),
             "kpis": result["context"].get("kpis", state["kpis"]),
             "unverified_skills": result["context"].get("unverified_skills", state["unverified_skills"]),
@@ -82,7 +145,39 @@ def create_worker_node(agent_instance, name):
     
     return worker_node
 
-def get_compiled_graph():
+@asynccontextmanager
+async def open_checkpointer(path: str = "data/graph_checkpoints.db"):
+    """
+    SQLite-backed checkpointer so graph state survives restarts and isn't held in a
+    growing in-memory dict. WAL lets checkpoint writes proceed alongside reads.
+    Requires langgraph-checkpoint-sqlite.
+    """
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    async with AsyncSqliteSaver.from_conn_string(path) as saver:
+        await saver.conn.executescript(
+            "PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL; PRAGMA temp_store=MEMORY;"
+        )
+        yield saver
+
+def get_compiled_graph(checkpointer=None):
+    """
+    The compiled interview graph. Without a checkpointer it is compiled once and shared by
+    every caller; with one (`async with open_checkpointer() as saver: get_compiled_graph(saver)`)
+    the shared builder is compiled against that live saver, so no graph outlives its connection.
+    """
+    if checkpointer is None:
+        return _shared_graph()
+    return _graph_builder().compile(checkpointer=checkpointer)
+
+@functools.lru_cache(maxsize=1)
+def _shared_graph():
+    return _graph_builder().compile()
+
+@functools.lru_cache(maxsize=1)
+def _graph_builder() -> StateGraph:
+    """The interview StateGraph with its agents, built once per process"""
     from src.agents.greeting_agent import GreetingAgent
     from src.agents.research_agent import ResearchAgent
     from src.agents.kpi_agent import KPIAgent
@@ -132,4 +227,4 @@ def get_compiled_graph():
     builder.add_edge("INTERVIEW", "SUPERVISOR")
     builder.add_edge("FEEDBACK", "SUPERVISOR")
     
-    return builder.compile()
+    return builder
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 
 class ContactInformation(BaseModel):
@@ -35,6 +35,16 @@ class CVData(BaseModel):
     certifications: List[str] = []
     languages: List[str] = []
 
+class DiscoveredProject(BaseModel):
+    name: str
+    description: str = ""
+
+class ResearchResult(BaseModel):
+    """Structured output of the research agent's skill-vs-evidence analysis"""
+    analysis: str = Field(description="A single encouraging sentence for the user about the research.")
+    unverified_skills: List[str] = Field(description="A list of 1-3 skills from the CV that seem to lack evidence.")
+    discovered_projects: List[DiscoveredProject] = Field(description="The list of projects found.")
+
 class CVResponse(BaseModel):
     id: int
     name: str
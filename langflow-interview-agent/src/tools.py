@@ -1,40 +1,71 @@
 from langchain_core.tools import tool
 from src.serper_service import SerperService
 from src.database import Database
-import json
+from src.json_utils import dumps
+from cachetools import TTLCache
+from functools import lru_cache
+import threading
 
 # Initialize services
 serper = SerperService()
-# Database will need to be initialized with path, usually handled in app startup
-# But for tools we can assume a singleton or pass it in. 
-# Here we'll initialize a default one for simplicity in migration.
-db = Database()
 
+@lru_cache(maxsize=1)
+def _db() -> Database:
+    """
+    Default Database for the tools, opened on first use rather than at import.
+    Database keeps one connection per thread (reads on query_only connections),
+    so concurrent tool calls don't share a sqlite handle.
+    """
+    return Database()
+
+# Positive lookup results, so repeated tool calls across turns and sessions skip Serper.
+# Negative results aren't kept here: a False/empty answer may come from a transient error.
+# SerperCache underneath keeps genuine no-result responses, for its shorter negative TTL.
+_LOOKUP_CACHE = TTLCache(maxsize=10000, ttl=24 * 3600)
+_LOOKUP_LOCK = threading.Lock()
+
+async def _cached_lookup(key, fetch):
+    with _LOOKUP_LOCK:
+        result = _LOOKUP_CACHE.get(key)
+    if result is None:
+        result = await fetch()
+        if result:
+            with _LOOKUP_LOCK:
+                _LOOKUP_CACHE[key] = result
+    return result
+
+# The Serper tools are async and share SerperService's pooled HTTP/2 client,
+# so concurrent tool calls reuse its keep-alive connections instead of worker threads
 @tool
-def verify_candidate_link(link: str, candidate_name: str) -> bool:
+async def verify_candidate_link(link: str, candidate_name: str) -> bool:
     """
     Verifies if a specific LinkedIn or GitHub link belongs to a candidate.
     Use this when you have a link from a CV and want to confirm it's authentic.
     """
-    return serper.verify_link(link, candidate_name)
+    return await _cached_lookup(
+        ("verify", link, candidate_name), lambda: serper.averify_link(link, candidate_name)
+    )
 
 @tool
-def discover_professional_links(candidate_name: str, platform: str = "linkedin") -> str:
+async def discover_professional_links(candidate_name: str, platform: str = "linkedin") -> str:
     """
     Searches for a candidate's professional profile link (LinkedIn or GitHub) on the web.
     Use this if the profile link is missing or unverified.
     Platform should be 'linkedin' or 'github'.
     """
-    return serper.search_profile(candidate_name, platform)
+    return await _cached_lookup(
+        ("profile", candidate_name, platform), lambda: serper.asearch_profile(candidate_name, platform)
+    )
 
 @tool
-def fetch_github_repositories(github_url: str) -> str:
+async def fetch_github_repositories(github_url: str) -> str:
     """
     Fetches the names and descriptions of a candidate's public GitHub repositories.
     Use this to gather evidence for technical skills listed on their CV.
     """
-    repos = serper.get_github_repos(github_url)
-    return json.dumps(repos)
+    url = github_url.lower().rstrip('/')
+    repos = await _cached_lookup(("repos", url), lambda: serper.aget_github_repos(url))
+    return dumps(repos)
 
 @tool
 def get_cv_details(cv_id: int) -> str:
@@ -42,10 +73,10 @@ def get_cv_details(cv_id: int) -> str:
     Retrieves the full parsed data of a candidate's CV from the database using their ID.
     Includes skills, employment history, and education.
     """
-    cv_data = db.get_cv_by_id(cv_id)
+    cv_data = _db().get_cv_by_id(cv_id)
     if not cv_data:
         return "CV not found."
-    return json.dumps(cv_data)
+    return dumps(cv_data)
 
 # Export a list of all tools
 ALL_TOOLS = [
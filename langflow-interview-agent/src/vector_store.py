@@ -3,82 +3,350 @@ Vector Store module for RAG-based schema retrieval.
 Uses ChromaDB with Google's text-embedding-004 model.
 """
 
+import atexit
 import chromadb
 from chromadb.config import Settings
 import google.generativeai as genai
-from typing import List, Dict, Any, Optional
-import json
+from cachetools import LRUCache
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import islice
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+import hashlib
+import logging
 import os
+import sqlite3
+import threading
+import numpy as np
 
 from src.config import API_KEY
+from src.json_utils import loads
+
+_log = logging.getLogger(__name__)
+
+# Texts per embed_content request (the API caps batch size)
+_EMBED_BATCH_SIZE = 100
+# Resume-context writes are buffered and flushed at this size or after this many seconds;
+# a flush also writes at most this many records per Chroma call
+_FLUSH_BATCH_SIZE = 100
+_FLUSH_INTERVAL = 1.0
+# Resume contexts are looked up by resume_id, never by similarity, so they are stored
+# without calling the embedding API (Chroma still requires a vector per record)
+_NO_EMBEDDING = [0.0]
+# Schema queries whose embedding is this close (cosine) to a cached query reuse its context
+_SEMANTIC_THRESHOLD = 0.95
+_CONTEXT_CACHE_SIZE = 256
+# HNSW settings for the schema collection. Chroma fixes them when a collection is
+# created, so an older collection built with the defaults is rebuilt once on startup.
+_SCHEMA_COLLECTION_METADATA = {
+    "description": "CV database schema and context",
+    "hnsw:space": "cosine",
+    "hnsw:construction_ef": 100
+}
+
+
+def _has_schema_index_settings(collection) -> bool:
+    metadata = collection.metadata or {}
+    return all(metadata.get(key) == value for key, value in _SCHEMA_COLLECTION_METADATA.items())
+
+
+class EmbeddingCache:
+    """
+    LRU cache of embeddings keyed by SHA-256 of (model name + text).
+    Vectors are held as float32 numpy arrays and persisted to a small SQLite file
+    as their raw bytes (rather than JSON/pickle) so restarts keep the cache.
+    """
+    
+    def __init__(self, model_name: str, path: Optional[str] = None, maxsize: int = 4096):
+        self.model_name = model_name
+        self.maxsize = maxsize
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        
+        if path:
+            try:
+                self._conn = sqlite3.connect(path, check_same_thread=False)
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, embedding BLOB NOT NULL)"
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                _log.warning("Embedding disk cache disabled: %s", e)
+                self._conn = None
+    
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+    
+    @staticmethod
+    def _encode(embedding: np.ndarray) -> bytes:
+        return np.asarray(embedding, dtype=np.float32).tobytes()
+    
+    @staticmethod
+    def _decode(value) -> np.ndarray:
+        if isinstance(value, str):
+            # Rows written before the float32 encoding
+            return np.asarray(loads(value), dtype=np.float32)
+        return np.frombuffer(value, dtype=np.float32)
+    
+    def _remember(self, key: str, embedding: np.ndarray):
+        self._memory[key] = embedding
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+    
+    def get(self, text: str) -> Optional[np.ndarray]:
+        key = self._key(text)
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+            if self._conn is None:
+                return None
+            row = self._conn.execute(
+                "SELECT embedding FROM embeddings WHERE key = ?", (key,)
+            ).fetchone()
+            if not row:
+                return None
+            embedding = self._decode(row[0])
+            self._remember(key, embedding)
+            return embedding
+    
+    def set(self, text: str, embedding: np.ndarray):
+        key = self._key(text)
+        with self._lock:
+            self._remember(key, embedding)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO embeddings (key, embedding) VALUES (?, ?)",
+                    (key, self._encode(embedding))
+                )
+                self._conn.commit()
+
+
+class ContextCache:
+    """
+    Two-tier cache of retrieved schema context: exact query text first, then the
+    nearest previously seen query embedding (cosine > _SEMANTIC_THRESHOLD).
+    Entries are per k, since k changes the retrieved chunks.
+    """
+    
+    def __init__(self, maxsize: int = _CONTEXT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._exact = LRUCache(maxsize=maxsize)
+        self._semantic: Dict[int, deque] = {}
+        self._lock = threading.Lock()
+    
+    def get_exact(self, query: str, k: int) -> Optional[str]:
+        with self._lock:
+            return self._exact.get((query, k))
+    
+    def get_similar(self, embedding, k: int) -> Optional[str]:
+        with self._lock:
+            entries = self._semantic.get(k)
+            if not entries:
+                return None
+            embeddings, contexts = zip(*entries)
+        # Stored vectors are unit length, so one matmul gives every cosine similarity
+        scores = np.stack(embeddings) @ self._normalize(embedding)
+        best = int(np.argmax(scores))
+        return contexts[best] if scores[best] > _SEMANTIC_THRESHOLD else None
+    
+    def set(self, query: str, k: int, embedding, context: str):
+        with self._lock:
+            self._exact[(query, k)] = context
+            entries = self._semantic.setdefault(k, deque(maxlen=self.maxsize))
+            entries.append((self._normalize(embedding), context))
+    
+    def clear(self):
+        with self._lock:
+            self._exact.clear()
+            self._semantic.clear()
+    
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+# Summary document indexed for each resume (bound format method, built once at import)
+_RESUME_CONTEXT_FORMAT = """RESUME: {display_name} (ID: {resume_id})
+SKILLS: {skills_text}
+COMPANIES: {companies_text}
+SKILL COUNT: {skill_count}
+JOB COUNT: {job_count}
+EDUCATION COUNT: {education_count}
+
+This resume can be queried using:
+- Skills: SELECT skill_name FROM skills WHERE resume_id = {resume_id}
+- Employment: SELECT * FROM employment_history WHERE resume_id = {resume_id}
+- Find this person: SELECT * FROM resumes WHERE id = {resume_id}
+- Find by name: SELECT * FROM resumes WHERE name LIKE '%{first_name}%'""".format
+
+
+@dataclass(slots=True)
+class ResumeView:
+    """Fields of a parsed resume needed for its vector-store context, extracted once"""
+    resume_id: int
+    name: Any
+    display_name: str
+    skills_text: str
+    companies_text: str
+    skill_count: int
+    job_count: int
+    education_count: int
+    
+    @classmethod
+    def from_resume(cls, resume_id: int, resume_data: Dict) -> "ResumeView":
+        name = resume_data.get('contact_information', {}).get('name', 'Unknown')
+        skills = resume_data.get('skills', [])
+        employment = resume_data.get('employment_history', [])
+        education = resume_data.get('education', [])
+        
+        companies = (job.get('company', '') for job in employment if job.get('company'))
+        return cls(
+            resume_id=resume_id,
+            name=name,
+            # Safe name handling
+            display_name=name if name else "Unknown Candidate",
+            skills_text=", ".join(islice(skills, 10)) if skills else "No skills listed",
+            companies_text=", ".join(islice(companies, 5)) or "No companies listed",
+            skill_count=len(skills),
+            job_count=len(employment),
+            education_count=len(education),
+        )
+    
+    def context_document(self) -> str:
+        return _RESUME_CONTEXT_FORMAT(
+            display_name=self.display_name,
+            resume_id=self.resume_id,
+            skills_text=self.skills_text,
+            companies_text=self.companies_text,
+            skill_count=self.skill_count,
+            job_count=self.job_count,
+            education_count=self.education_count,
+            first_name=self.display_name.split()[0]
+        )
+    
+    def metadata(self) -> Dict[str, Any]:
+        return {
+            "table": "resumes",
+            "type": "resume_context",
+            "resume_id": str(self.resume_id),
+            "name": self.name
+        }
 
 
 class GoogleEmbeddingFunction:
     """Custom embedding function using Google's text-embedding-004"""
     
-    def __init__(self):
+    def __init__(self, cache_path: Optional[str] = None):
         if not API_KEY:
             raise ValueError("GEMINI_API_KEY required for embeddings")
         genai.configure(api_key=API_KEY)
         self.model_name = "models/embedding-001"
+        self.cache = EmbeddingCache(self.model_name, cache_path)
     
     def name(self) -> str:
         """Return the name of the embedding function (required by ChromaDB)"""
         return "google-embedding-001"
     
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Embed several texts with one API call"""
+        result = genai.embed_content(
+            model=self.model_name,
+            content=texts
+        )
+        embedding = result['embedding']
+        if embedding and isinstance(embedding[0], list):
+            return embedding
+        if len(texts) == 1:
+            return [embedding]
+        # Older SDKs only embed one text per request
+        return [genai.embed_content(model=self.model_name, content=text)['embedding'] for text in texts]
+    
+    def _cache_misses(self, input: List[str]):
+        """Cached embeddings (None for misses) and the miss positions split into API-sized batches"""
+        embeddings = [self.cache.get(text) for text in input]
+        misses = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        batches = [misses[start:start + _EMBED_BATCH_SIZE] for start in range(0, len(misses), _EMBED_BATCH_SIZE)]
+        return embeddings, batches
+    
+    def _fill(self, input: List[str], embeddings: List, batch: List[int], vectors: List[List[float]]):
+        for i, embedding in zip(batch, vectors):
+            embeddings[i] = np.asarray(embedding, dtype=np.float32)
+            self.cache.set(input[i], embeddings[i])
+    
+    def embed(self, input: List[str]) -> np.ndarray:
+        """Embeddings for a list of texts as a float32 matrix, reusing cached vectors where possible"""
+        # Only cache misses go to the API, batched and reassembled in input order
+        embeddings, batches = self._cache_misses(input)
+        for batch in batches:
+            self._fill(input, embeddings, batch, self._embed_batch([input[i] for i in batch]))
+        return _stack(embeddings)
+    
     def __call__(self, input: List[str]) -> List[List[float]]:
-        """Generate embeddings for a list of texts"""
-        embeddings = []
-        for text in input:
-            result = genai.embed_content(
-                model=self.model_name,
-                content=text
-            )
-            embeddings.append(result['embedding'])
-        return embeddings
+        """Generate embeddings for a list of texts (ChromaDB embedding function interface)"""
+        return to_list_of_list(self.embed(input))
 
 
-class SchemaVectorStore:
-    """
-    Vector store for CV database schema using ChromaDB.
-    Implements table-level chunking strategy.
-    """
+def _stack(embeddings: List[np.ndarray]) -> np.ndarray:
+    return np.stack(embeddings) if embeddings else np.empty((0, 0), dtype=np.float32)
+
+
+def to_list_of_list(embeddings: np.ndarray) -> List[List[float]]:
+    """Embedding matrix in the list-of-lists form ChromaDB expects"""
+    return embeddings.tolist()
+
+
+def _format_query_results(results) -> str:
+    """Format collection.query results as LLM context, or the default schema when empty"""
+    if not results or not results['documents'] or not results['documents'][0]:
+        _log.debug("No relevant chunks found, using default schema")
+        return SchemaVectorStore._get_default_schema()
     
-    def __init__(self, persist_directory: str = "data/chroma_db"):
-        """Initialize ChromaDB with persistent storage"""
-        self.persist_directory = persist_directory
-        
-        # Create directory if not exists
-        os.makedirs(persist_directory, exist_ok=True)
-        
-        # Initialize ChromaDB with persistence
-        self.client = chromadb.PersistentClient(path=persist_directory)
-        
-        # Initialize embedding function
-        self.embedding_fn = GoogleEmbeddingFunction()
-        
-        # Get or create collection
-        self.collection = self.client.get_or_create_collection(
-            name="cv_schema",
-            embedding_function=self.embedding_fn,
-            metadata={"description": "CV database schema and context"}
-        )
-        
-        print(f"[VectorStore] Initialized at {persist_directory}")
-        
-        # Index schema chunks if collection is empty
-        if self.collection.count() == 0:
-            self._index_schema_chunks()
+    documents = results['documents'][0]
+    metadatas = results['metadatas'][0]
     
-    def _create_schema_chunks(self) -> List[Dict[str, Any]]:
-        """
-        Create table-level chunks for the database schema.
-        Each chunk contains: table info, columns, relationships, query patterns.
-        """
-        chunks = [
-            {
-                "id": "table_resumes",
-                "content": """TABLE: resumes
+    # Build context from retrieved chunks
+    context_parts = []
+    for doc, meta in zip(documents, metadatas):
+        table = meta.get('table', 'unknown')
+        chunk_type = meta.get('type', 'schema')
+        context_parts.append(f"--- {table.upper()} ({chunk_type}) ---\n{doc}")
+    
+    context = "\n\n".join(context_parts)
+    
+    _log.debug("Retrieved %d relevant chunks", len(documents))
+    return context
+
+
+@lru_cache(maxsize=4)
+def _get_client(path: str):
+    """One Chroma client per persist directory (each client loads its index into RAM)"""
+    return chromadb.PersistentClient(path=path)
+
+
+@lru_cache(maxsize=4)
+def _get_embedding_fn(cache_path: str) -> GoogleEmbeddingFunction:
+    """Shared embedding function, so genai.configure and the cache DB are set up once"""
+    return GoogleEmbeddingFunction(cache_path=cache_path)
+
+
+@lru_cache(maxsize=4)
+def get_vector_store(persist_directory: str = "data/chroma_db") -> "SchemaVectorStore":
+    """Process-wide SchemaVectorStore for a persist directory"""
+    return SchemaVectorStore(persist_directory)
+
+
+# Table-level chunks of the database schema. Each chunk contains: table info, columns,
+# relationships, query patterns. Built once at import and shared by every store.
+_SCHEMA_CHUNKS: Tuple[Dict[str, Any], ...] = (
+    {
+        "id": "table_resumes",
+        "content": """TABLE: resumes
 PURPOSE: Main table storing parsed CV/resume information for each candidate.
 
 COLUMNS:
@@ -91,7 +359,7 @@ COLUMNS:
 - linkedin (TEXT): LinkedIn profile URL
 - github (TEXT): GitHub profile URL
 - profile (TEXT): Professional summary/profile text
-- raw_data (TEXT): Original JSON parsed data
+- raw_data (BLOB): Original parsed data as zstd-compressed JSON; not usable in SQL filters
 - created_at (TIMESTAMP): When the resume was added
 
 RELATIONSHIPS:
@@ -106,11 +374,11 @@ COMMON QUERIES:
 - Count resumes: SELECT COUNT(*) FROM resumes
 - Find by name: SELECT * FROM resumes WHERE name LIKE '%search%'
 - Find by email: SELECT * FROM resumes WHERE email = 'email@example.com'""",
-                "metadata": {"table": "resumes", "type": "schema", "category": "main"}
-            },
-            {
-                "id": "table_skills",
-                "content": """TABLE: skills
+        "metadata": {"table": "resumes", "type": "schema", "category": "main"}
+    },
+    {
+        "id": "table_skills",
+        "content": """TABLE: skills
 PURPOSE: Stores individual skills for each resume (normalized, one skill per row).
 
 COLUMNS:
@@ -130,11 +398,11 @@ COMMON QUERIES:
 - Find people with skill: SELECT r.name FROM resumes r JOIN skills s ON r.id = s.resume_id WHERE s.skill_name LIKE '%Python%'
 - Most common skills: SELECT skill_name, COUNT(*) as count FROM skills GROUP BY skill_name ORDER BY count DESC
 - Person with most skills: SELECT r.name, COUNT(s.id) as skill_count FROM resumes r LEFT JOIN skills s ON r.id = s.resume_id GROUP BY r.id ORDER BY skill_count DESC LIMIT 1""",
-                "metadata": {"table": "skills", "type": "schema", "category": "attributes"}
-            },
-            {
-                "id": "table_employment",
-                "content": """TABLE: employment_history
+        "metadata": {"table": "skills", "type": "schema", "category": "attributes"}
+    },
+    {
+        "id": "table_employment",
+        "content": """TABLE: employment_history
 PURPOSE: Stores work experience entries for each resume.
 
 COLUMNS:
@@ -157,11 +425,11 @@ COMMON QUERIES:
 - Work history for person: SELECT job_title, company_name, start_date, end_date FROM employment_history WHERE resume_id = ?
 - People who worked at company: SELECT r.name, e.job_title FROM resumes r JOIN employment_history e ON r.id = e.resume_id WHERE e.company_name LIKE '%Google%'
 - Count jobs per person: SELECT r.name, COUNT(e.id) as job_count FROM resumes r LEFT JOIN employment_history e ON r.id = e.resume_id GROUP BY r.id""",
-                "metadata": {"table": "employment_history", "type": "schema", "category": "experience"}
-            },
-            {
-                "id": "table_education",
-                "content": """TABLE: education
+        "metadata": {"table": "employment_history", "type": "schema", "category": "experience"}
+    },
+    {
+        "id": "table_education",
+        "content": """TABLE: education
 PURPOSE: Stores educational background for each resume.
 
 COLUMNS:
@@ -183,11 +451,11 @@ COMMON QUERIES:
 - Education for person: SELECT degree, institution, end_date FROM education WHERE resume_id = ?
 - People from university: SELECT r.name, e.degree FROM resumes r JOIN education e ON r.id = e.resume_id WHERE e.institution LIKE '%MIT%'
 - Count by degree type: SELECT degree, COUNT(*) as count FROM education GROUP BY degree ORDER BY count DESC""",
-                "metadata": {"table": "education", "type": "schema", "category": "education"}
-            },
-            {
-                "id": "table_certifications",
-                "content": """TABLE: certifications
+        "metadata": {"table": "education", "type": "schema", "category": "education"}
+    },
+    {
+        "id": "table_certifications",
+        "content": """TABLE: certifications
 PURPOSE: Stores professional certifications for each resume.
 
 COLUMNS:
@@ -205,11 +473,11 @@ COMMON QUERIES:
 - Certifications for person: SELECT certification_name FROM certifications WHERE resume_id = ?
 - People with certification: SELECT r.name FROM resumes r JOIN certifications c ON r.id = c.resume_id WHERE c.certification_name LIKE '%AWS%'
 - Most common certifications: SELECT certification_name, COUNT(*) as count FROM certifications GROUP BY certification_name ORDER BY count DESC""",
-                "metadata": {"table": "certifications", "type": "schema", "category": "credentials"}
-            },
-            {
-                "id": "table_languages",
-                "content": """TABLE: languages
+        "metadata": {"table": "certifications", "type": "schema", "category": "credentials"}
+    },
+    {
+        "id": "table_languages",
+        "content": """TABLE: languages
 PURPOSE: Stores language proficiencies for each resume.
 
 COLUMNS:
@@ -227,11 +495,11 @@ COMMON QUERIES:
 - Languages for person: SELECT language_name FROM languages WHERE resume_id = ?
 - People speaking language: SELECT r.name FROM resumes r JOIN languages l ON r.id = l.resume_id WHERE l.language_name LIKE '%Spanish%'
 - Most common languages: SELECT language_name, COUNT(*) as count FROM languages GROUP BY language_name ORDER BY count DESC""",
-                "metadata": {"table": "languages", "type": "schema", "category": "attributes"}
-            },
-            {
-                "id": "relationships_overview",
-                "content": """DATABASE RELATIONSHIPS OVERVIEW
+        "metadata": {"table": "languages", "type": "schema", "category": "attributes"}
+    },
+    {
+        "id": "relationships_overview",
+        "content": """DATABASE RELATIONSHIPS OVERVIEW
 
 The CV database uses a normalized schema with the following structure:
 
@@ -270,11 +538,11 @@ JOIN PATTERNS:
    LEFT JOIN employment_history e ON r.id = e.resume_id
 
 IMPORTANT: Always use LEFT JOIN when counting to include resumes with zero related items.""",
-                "metadata": {"table": "all", "type": "relationships", "category": "overview"}
-            },
-            {
-                "id": "sql_patterns",
-                "content": """COMMON SQL PATTERNS FOR CV DATABASE
+        "metadata": {"table": "all", "type": "relationships", "category": "overview"}
+    },
+    {
+        "id": "sql_patterns",
+        "content": """COMMON SQL PATTERNS FOR CV DATABASE
 
 COUNTING:
 - Total resumes: SELECT COUNT(*) as total FROM resumes
@@ -303,27 +571,123 @@ NULL HANDLING:
 DISTINCT:
 - Unique values: SELECT DISTINCT column FROM table
 - Unique combinations: SELECT DISTINCT col1, col2 FROM table""",
-                "metadata": {"table": "all", "type": "patterns", "category": "queries"}
-            }
-        ]
+        "metadata": {"table": "all", "type": "patterns", "category": "queries"}
+    }
+)
+
+# Parallel id/document/metadata views of _SCHEMA_CHUNKS for collection writes
+_SCHEMA_IDS = tuple(chunk["id"] for chunk in _SCHEMA_CHUNKS)
+_SCHEMA_DOCS = tuple(chunk["content"] for chunk in _SCHEMA_CHUNKS)
+_SCHEMA_METAS = tuple(chunk["metadata"] for chunk in _SCHEMA_CHUNKS)
+
+
+class SchemaVectorStore:
+    """
+    Vector store for CV database schema using ChromaDB.
+    Implements table-level chunking strategy.
+    """
+    
+    def __init__(self, persist_directory: str = "data/chroma_db"):
+        """Initialize ChromaDB with persistent storage"""
+        self.persist_directory = persist_directory
+        
+        # Create directory if not exists
+        os.makedirs(persist_directory, exist_ok=True)
         
-        return chunks
+        # Initialize ChromaDB with persistence
+        self.client = _get_client(persist_directory)
+        
+        # Initialize embedding function (with a persistent embedding cache)
+        self.embedding_fn = _get_embedding_fn(os.path.join(persist_directory, "embedding_cache.db"))
+        
+        self._schema_marker = os.path.join(persist_directory, ".schema_indexed")
+        
+        # Metadata-only collection for per-resume context documents
+        self.meta_collection = self.client.get_or_create_collection(
+            name="cv_resume_meta",
+            embedding_function=None,
+            metadata={"description": "Per-resume context, looked up by resume_id"}
+        )
+        
+        # Get or create collection
+        self.collection = self._open_schema_collection()
+        self._migrate_resume_contexts()
+        
+        # Buffered resume-context writes (id -> (document, metadata)) and deletes
+        self._pending_upserts: Dict[str, tuple] = {}
+        self._pending_deletes: set = set()
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flush_timer: Optional[threading.Timer] = None
+        atexit.register(self.flush)
+        
+        # Retrieved schema context, reused for repeated or near-identical questions
+        self.context_cache = ContextCache()
+        
+        _log.info("Vector store initialized at %s", persist_directory)
+        
+        # Index schema chunks if collection is empty; the marker file saves the
+        # count() query once the schema has been indexed
+        if not os.path.exists(self._schema_marker):
+            if self.collection.count() == 0:
+                self._index_schema_chunks()
+            else:
+                self._mark_schema_indexed()
     
-    def _index_schema_chunks(self):
-        """Index all schema chunks into ChromaDB"""
-        chunks = self._create_schema_chunks()
+    def _open_schema_collection(self):
+        """The cv_schema collection, rebuilt first if it predates the HNSW settings"""
+        try:
+            existing = self.client.get_collection(name="cv_schema", embedding_function=self.embedding_fn)
+        except Exception:
+            existing = None
         
-        ids = [chunk["id"] for chunk in chunks]
-        documents = [chunk["content"] for chunk in chunks]
-        metadatas = [chunk["metadata"] for chunk in chunks]
+        if existing is not None and not _has_schema_index_settings(existing):
+            # Only the derived schema chunks live here once resume contexts are moved
+            # out, and their embeddings are cached, so rebuilding is cheap
+            self.collection = existing
+            self._migrate_resume_contexts()
+            self.client.delete_collection(name="cv_schema")
+            if os.path.exists(self._schema_marker):
+                os.remove(self._schema_marker)
+            _log.info("Rebuilding cv_schema with HNSW settings %s", _SCHEMA_COLLECTION_METADATA)
         
+        return self.client.get_or_create_collection(
+            name="cv_schema",
+            embedding_function=self.embedding_fn,
+            metadata=_SCHEMA_COLLECTION_METADATA
+        )
+    
+    def _migrate_resume_contexts(self):
+        """Move resume contexts indexed by older versions out of the embedded schema collection"""
+        try:
+            legacy = self.collection.get(where={"type": "resume_context"}, include=["documents", "metadatas"])
+            if legacy['ids']:
+                self.meta_collection.upsert(
+                    ids=legacy['ids'],
+                    documents=legacy['documents'],
+                    metadatas=legacy['metadatas'],
+                    embeddings=[_NO_EMBEDDING] * len(legacy['ids'])
+                )
+                self.collection.delete(ids=legacy['ids'])
+                _log.info("Moved %d resume contexts to cv_resume_meta", len(legacy['ids']))
+        except Exception as e:
+            _log.error("Resume context migration failed: %s", e)
+    
+    def _index_schema_chunks(self):
+        """Index all schema chunks into ChromaDB"""
+        # Chroma validates the arguments as lists
         self.collection.add(
-            ids=ids,
-            documents=documents,
-            metadatas=metadatas
+            ids=list(_SCHEMA_IDS),
+            documents=list(_SCHEMA_DOCS),
+            metadatas=list(_SCHEMA_METAS)
         )
         
-        print(f"[VectorStore] Indexed {len(chunks)} schema chunks")
+        self._mark_schema_indexed()
+        _log.info("Indexed %d schema chunks", len(_SCHEMA_CHUNKS))
+    
+    def _mark_schema_indexed(self):
+        with open(self._schema_marker, "w") as f:
+            f.write("1")
     
     def add_resume_context(self, resume_id: int, resume_data: Dict) -> bool:
         """
@@ -331,99 +695,168 @@ DISTINCT:
         This enriches the vector store with candidate-specific information.
         """
         try:
-            name = resume_data.get('contact_information', {}).get('name', 'Unknown')
-            skills = resume_data.get('skills', [])
-            employment = resume_data.get('employment_history', [])
-            education = resume_data.get('education', [])
+            view = ResumeView.from_resume(resume_id, resume_data)
+            name = view.name
             
             # Create a summary document for this resume
-            skills_text = ", ".join(skills[:10]) if skills else "No skills listed"
-            companies = [job.get('company', '') for job in employment if job.get('company')]
-            companies_text = ", ".join(companies[:5]) if companies else "No companies listed"
+            content = view.context_document()
+            metadata = view.metadata()
+            doc_id = f"resume_{resume_id}"
+            with self._pending_lock:
+                self._pending_deletes.discard(doc_id)
+                self._pending_upserts[doc_id] = (content, metadata)
+                pending = len(self._pending_upserts)
             
-            # Safe name handling
-            display_name = name if name else "Unknown Candidate"
-            
-            content = f"""RESUME: {display_name} (ID: {resume_id})
-SKILLS: {skills_text}
-COMPANIES: {companies_text}
-SKILL COUNT: {len(skills)}
-JOB COUNT: {len(employment)}
-EDUCATION COUNT: {len(education)}
-
-This resume can be queried using:
-- Skills: SELECT skill_name FROM skills WHERE resume_id = {resume_id}
-- Employment: SELECT * FROM employment_history WHERE resume_id = {resume_id}
-- Find this person: SELECT * FROM resumes WHERE id = {resume_id}
-- Find by name: SELECT * FROM resumes WHERE name LIKE '%{display_name.split()[0]}%'"""
-            
-            self.collection.upsert(
-                ids=[f"resume_{resume_id}"],
-                documents=[content],
-                metadatas=[{
-                    "table": "resumes",
-                    "type": "resume_context",
-                    "resume_id": str(resume_id),
-                    "name": name
-                }]
-            )
-            
-            print(f"[VectorStore] Added context for resume {resume_id}: {name}")
+            _log.debug("Queued context for resume %s: %s", resume_id, name)
+            self._flush_soon(pending)
             return True
             
         except Exception as e:
-            print(f"[VectorStore ERROR] Failed to add resume context: {e}")
+            _log.error("Failed to add resume context: %s", e)
             return False
     
+    def add_batch(self, items: Iterable[Tuple[int, Dict]]) -> int:
+        """
+        Queue contexts for many (resume_id, resume_data) pairs under one lock acquisition.
+        Returns how many were queued; unreadable resumes are skipped.
+        """
+        records = {}
+        for resume_id, resume_data in items:
+            try:
+                view = ResumeView.from_resume(resume_id, resume_data)
+                records[f"resume_{resume_id}"] = (view.context_document(), view.metadata())
+            except Exception as e:
+                _log.error("Failed to add resume context for %s: %s", resume_id, e)
+        if not records:
+            return 0
+        
+        with self._pending_lock:
+            self._pending_deletes.difference_update(records)
+            self._pending_upserts.update(records)
+            pending = len(self._pending_upserts)
+        
+        _log.debug("Queued context for %d resumes", len(records))
+        self._flush_soon(pending)
+        return len(records)
+    
     def remove_resume_context(self, resume_id: int) -> bool:
         """Remove resume context when a resume is deleted"""
         try:
-            self.collection.delete(ids=[f"resume_{resume_id}"])
-            print(f"[VectorStore] Removed context for resume {resume_id}")
+            doc_id = f"resume_{resume_id}"
+            with self._pending_lock:
+                self._pending_upserts.pop(doc_id, None)
+                self._pending_deletes.add(doc_id)
+                pending = len(self._pending_deletes)
+            _log.debug("Queued removal of context for resume %s", resume_id)
+            self._flush_soon(pending)
             return True
         except Exception as e:
-            print(f"[VectorStore ERROR] Failed to remove resume context: {e}")
+            _log.error("Failed to remove resume context: %s", e)
             return False
     
+    def _flush_soon(self, pending: int):
+        """Flush now if the buffer is full, otherwise make sure a flush is scheduled"""
+        if pending >= _FLUSH_BATCH_SIZE:
+            self.flush()
+            return
+        with self._pending_lock:
+            self._schedule_flush()
+    
+    def _schedule_flush(self):
+        """Start the flush timer unless one is already pending (caller holds _pending_lock)"""
+        if self._flush_timer is None:
+            self._flush_timer = threading.Timer(_FLUSH_INTERVAL, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+    
+    def flush(self) -> bool:
+        """Write buffered resume-context upserts and deletes to Chroma in one call each"""
+        with self._flush_lock:
+            with self._pending_lock:
+                if self._flush_timer is not None:
+                    self._flush_timer.cancel()
+                    self._flush_timer = None
+                upserts, self._pending_upserts = self._pending_upserts, {}
+                deletes, self._pending_deletes = self._pending_deletes, set()
+            
+            unwritten_deletes, records, written = deletes, list(upserts.items()), 0
+            try:
+                if deletes:
+                    self.meta_collection.delete(ids=list(deletes))
+                unwritten_deletes = set()
+                while written < len(records):
+                    batch = records[written:written + _FLUSH_BATCH_SIZE]
+                    self.meta_collection.upsert(
+                        ids=[id for id, _ in batch],
+                        documents=[doc for _, (doc, _) in batch],
+                        metadatas=[meta for _, (_, meta) in batch],
+                        embeddings=[_NO_EMBEDDING] * len(batch)
+                    )
+                    written += len(batch)
+                if deletes or upserts:
+                    _log.debug("Flushed %d resume contexts, %d removals", len(upserts), len(deletes))
+                return True
+            except Exception as e:
+                _log.error("Failed to flush resume contexts: %s", e)
+                self._requeue(unwritten_deletes, records[written:])
+                return False
+    
+    def _requeue(self, deletes: set, records: List[tuple]):
+        """Put writes from a failed flush back in the buffer, unless newer ones replaced them, and retry later"""
+        with self._pending_lock:
+            queued = self._pending_upserts.keys() | self._pending_deletes
+            self._pending_deletes.update(deletes - queued)
+            for doc_id, record in records:
+                if doc_id not in queued:
+                    self._pending_upserts[doc_id] = record
+            if self._pending_upserts or self._pending_deletes:
+                self._schedule_flush()
+    
     def get_relevant_context(self, query: str, k: int = 3) -> str:
         """
         Retrieve top-k relevant schema chunks for a user query.
         Returns formatted context string for the LLM prompt.
         """
+        context = self.context_cache.get_exact(query, k)
+        if context is not None:
+            return context
+        
+        # Only schema chunks are queried; buffered resume contexts are flushed by the
+        # meta_collection readers (get_resume_context), not here
         try:
-            # Generate query embedding manually
-            query_embedding = self.embedding_fn([query])[0]
+            # Embedded once (through the embedding cache) for both the similarity check and the query
+            query_embedding = self.embedding_fn.embed([query])[0]
+            context = self.context_cache.get_similar(query_embedding, k)
+            if context is not None:
+                _log.debug("Reusing context of a similar query")
+                return context
             
             results = self.collection.query(
-                query_embeddings=[query_embedding],
+                query_embeddings=[query_embedding.tolist()],
                 n_results=k,
                 include=["documents", "metadatas"]
             )
             
-            if not results or not results['documents'] or not results['documents'][0]:
-                print("[VectorStore] No relevant chunks found, using default schema")
-                return self._get_default_schema()
-            
-            documents = results['documents'][0]
-            metadatas = results['metadatas'][0]
-            
-            # Build context from retrieved chunks
-            context_parts = []
-            for doc, meta in zip(documents, metadatas):
-                table = meta.get('table', 'unknown')
-                chunk_type = meta.get('type', 'schema')
-                context_parts.append(f"--- {table.upper()} ({chunk_type}) ---\n{doc}")
-            
-            context = "\n\n".join(context_parts)
-            
-            print(f"[VectorStore] Retrieved {len(documents)} relevant chunks")
+            context = _format_query_results(results)
+            self.context_cache.set(query, k, query_embedding, context)
             return context
             
         except Exception as e:
-            print(f"[VectorStore ERROR] Query failed: {e}")
+            _log.error("Query failed: %s", e)
             return self._get_default_schema()
     
-    def _get_default_schema(self) -> str:
+    def get_resume_context(self, resume_id: int) -> Optional[str]:
+        """Context document for one resume (metadata lookup, no embedding)"""
+        self.flush()
+        try:
+            result = self.meta_collection.get(where={"resume_id": str(resume_id)}, include=["documents"])
+            return result['documents'][0] if result['documents'] else None
+        except Exception as e:
+            _log.error("Resume context lookup failed: %s", e)
+            return None
+    
+    @staticmethod
+    def _get_default_schema() -> str:
         """Fallback schema if vector search fails"""
         return """
 DATABASE SCHEMA:
@@ -441,24 +874,50 @@ Key Relationships:
     
     def get_collection_stats(self) -> Dict:
         """Get statistics about the vector store"""
+        self.flush()
         return {
-            "total_documents": self.collection.count(),
+            "total_documents": self.collection.count() + self.meta_collection.count(),
             "persist_directory": self.persist_directory
         }
     
     def reindex_schema(self):
-        """Force reindex of all schema chunks"""
-        # Delete existing schema chunks (keep resume contexts)
+        """
+        Reindex schema chunks, keeping resume contexts. Chunks whose text is unchanged
+        are left in place, so only new or edited chunks are embedded and written.
+        """
+        self.flush()
+        self.context_cache.clear()
+        if os.path.exists(self._schema_marker):
+            os.remove(self._schema_marker)
+        chunks = _SCHEMA_CHUNKS
         try:
-            existing = self.collection.get()
-            schema_ids = [
-                id for id, meta in zip(existing['ids'], existing['metadatas'])
-                if meta.get('type') != 'resume_context'
-            ]
-            if schema_ids:
-                self.collection.delete(ids=schema_ids)
-        except:
+            # Resume contexts are filtered out by Chroma, and only ids come back
+            existing_ids = self.collection.get(
+                where={"type": {"$ne": "resume_context"}},
+                include=[]
+            )['ids']
+            # Documents are fetched for the known schema ids only
+            existing = self.collection.get(ids=list(_SCHEMA_IDS), include=["documents"])
+            current = dict(zip(existing['ids'], existing['documents']))
+        except Exception:
+            existing_ids, current = [], {}
+        
+        chunk_ids = set(_SCHEMA_IDS)
+        stale_ids = [id for id in existing_ids if id not in chunk_ids]
+        changed = [chunk for chunk in chunks if current.get(chunk["id"]) != chunk["content"]]
+        
+        try:
+            if stale_ids:
+                self.collection.delete(ids=stale_ids)
+        except Exception:
             pass
         
-        self._index_schema_chunks()
-        print("[VectorStore] Schema reindexed")
+        if changed:
+            self.collection.upsert(
+                ids=[chunk["id"] for chunk in changed],
+                documents=[chunk["content"] for chunk in changed],
+                metadatas=[chunk["metadata"] for chunk in changed]
+            )
+        self._mark_schema_indexed()
+        _log.info("Schema reindexed (%d updated, %d removed, %d unchanged)",
+                  len(changed), len(stale_ids), len(chunks) - len(changed))